@@ -1,54 +1,67 @@
 import click
 
+import re
 import subprocess
-import tempfile
+import uuid
 import zipfile
 import json
 import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+GH_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+CHARMCRAFT_WORKERS = 8
+COMMIT_DATE_RE = re.compile(rb"^commit_date:(.*)$", re.MULTILINE)
+
+
+_ensured_dirs: set[str] = set()
+
+
+def _ensure_dir(path):
+    """Create path once per process; later calls skip the syscall."""
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
 
 
 def download_and_get_ts(charm, channel, base, verbose=False):
     # ensure juju’s common snap tmp dir exists
     juju_tmp = os.path.expanduser("~/snap/juju/common")
-    os.makedirs(juju_tmp, exist_ok=True)
+    _ensure_dir(juju_tmp)
 
-    # download charm into that dir, silently
-    dest = tempfile.NamedTemporaryFile(suffix=".charm", delete=False, dir=juju_tmp).name
+    # download charm into that dir, silently; juju creates the file itself
+    # so only a unique name is needed, not an open temporary file
+    dest = os.path.join(juju_tmp, f"cephtools-{uuid.uuid4().hex}.charm")
     if verbose:
         click.echo(
             f"Downloading {charm} from channel {channel} (base {base}) to {dest}"
         )
-    subprocess.check_call(
-        [
-            "juju",
-            "download",
-            charm,
-            "--channel",
-            channel,
-            "--base",
-            base,
-            "--filepath",
-            dest,
-        ],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
 
     # extract git-info.txt and then delete the file
     try:
+        subprocess.check_call(
+            [
+                "juju",
+                "download",
+                charm,
+                "--channel",
+                channel,
+                "--base",
+                base,
+                "--filepath",
+                dest,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
         with zipfile.ZipFile(dest) as z:
-            with z.open("git-info.txt") as f:
-                for line in f:
-                    line = line.decode()
-                    if line.startswith("commit_date:"):
-                        ts = line.split(":", 1)[1].strip()
-                        parsed = datetime.fromisoformat(ts)
-                        if verbose:
-                            click.echo(
-                                f"  commit_date for {charm} ({channel}): {parsed}"
-                            )
-                        return parsed
+            blob = z.read("git-info.txt")
+        match = COMMIT_DATE_RE.search(blob)
+        if match:
+            parsed = datetime.fromisoformat(match.group(1).strip().decode())
+            if verbose:
+                click.echo(f"  commit_date for {charm} ({channel}): {parsed}")
+            return parsed
         raise RuntimeError("commit_date not found in git-info.txt")
     finally:
         try:
@@ -72,7 +85,6 @@ def run_gh_pr_list(gh_base, repo_path):
         ],
         check=True,
         capture_output=True,
-        text=True,
         cwd=repo_path,
     )
     return json.loads(proc.stdout)
@@ -80,15 +92,75 @@ def run_gh_pr_list(gh_base, repo_path):
 
 def run_charmcraft_status(charm):
     """Run charmcraft status and return the JSON output."""
+    # json.loads accepts the raw UTF-8 bytes, so skip decoding stdout to text
     proc = subprocess.run(
         ["charmcraft", "status", charm, "--format", "json"],
         capture_output=True,
-        text=True,
         check=True,
     )
     return json.loads(proc.stdout)
 
 
+def _utc_stamp(ts):
+    return ts.astimezone(timezone.utc).strftime(GH_TIMESTAMP_FORMAT)
+
+
+def fetch_charmcraft_statuses(charms):
+    """
+    Fetch charmcraft status for several charms concurrently.
+
+    Results are returned in the order of ``charms``; a charm whose status
+    could not be fetched or parsed gets the raised exception instead. Each
+    distinct charm is queried only once, even if it is listed repeatedly.
+    """
+
+    def fetch(charm):
+        try:
+            return run_charmcraft_status(charm)
+        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
+            return e
+
+    unique = list(dict.fromkeys(charms))
+    if not unique:
+        return []
+    workers = min(CHARMCRAFT_WORKERS, len(unique))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        by_charm = dict(zip(unique, executor.map(fetch, unique)))
+    return [by_charm[charm] for charm in charms]
+
+
+def release_charm_revisions(releases, target):
+    """
+    Release charm revisions to the target channel, one thread per charm.
+
+    ``releases`` is a sequence of ``(charm, revisions)`` pairs. Revisions of
+    the same charm are released in order; different charms run concurrently.
+    Returns, in the order of ``releases``, a list per charm holding None for
+    each successful revision or the CalledProcessError for a failed one.
+    """
+
+    def release(item):
+        charm, revisions = item
+        errors = []
+        for revision in revisions:
+            try:
+                subprocess.run(
+                    ["charmcraft", "release", "-r", revision, "-c", target, charm],
+                    check=True,
+                )
+            except subprocess.CalledProcessError as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+        return errors
+
+    if not releases:
+        return []
+    workers = min(CHARMCRAFT_WORKERS, len(releases))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(release, releases))
+
+
 def get_prs(gh_base, charm_name, start_ts, end_ts, repo_path, verbose=False):
     prs = run_gh_pr_list(gh_base, repo_path)
     if verbose:
@@ -97,19 +169,24 @@ def get_prs(gh_base, charm_name, start_ts, end_ts, repo_path, verbose=False):
             f"Filtering PRs between {start_ts} and {end_ts} touching {charm_name}/"
         )
 
-    def parse(ts):
-        return datetime.fromisoformat(ts)
+    # gh reports closedAt as canonical UTC ("YYYY-MM-DDTHH:MM:SSZ"), which
+    # sorts lexicographically, so compare strings and only parse odd formats.
+    start_str = _utc_stamp(start_ts)
+    end_str = _utc_stamp(end_ts)
+
+    def in_window(closed_at):
+        if len(closed_at) == len(start_str) and closed_at.endswith("Z"):
+            return start_str < closed_at <= end_str
+        return start_ts < datetime.fromisoformat(closed_at) <= end_ts
 
-    matched = []
-    for pr in prs:
-        closed = parse(pr["closedAt"])
-        if start_ts < closed <= end_ts:
-            # include only if any file path under the charm subdir
-            for f in pr.get("files", []):
-                if f.get("path", "").startswith(f"{charm_name}/"):
-                    matched.append(pr)
-                    break
-    return matched
+    # include only PRs touching any file path under the charm subdir
+    prefix = f"{charm_name}/"
+    return [
+        pr
+        for pr in prs
+        if in_window(pr["closedAt"])
+        and any(f.get("path", "").startswith(prefix) for f in pr.get("files", []))
+    ]
 
 
 @click.command()
@@ -124,8 +201,16 @@ def get_prs(gh_base, charm_name, start_ts, end_ts, repo_path, verbose=False):
 )
 def list_prs(charm, source, target, base, base_branch, repo, verbose):
     """A tool to list PRs for a given charm between releases."""
-    src_ts = download_and_get_ts(charm, source, base, verbose=verbose)
-    tgt_ts = download_and_get_ts(charm, target, base, verbose=verbose)
+    # both downloads are network-bound, so fetch the two channels in parallel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        src_future = executor.submit(
+            download_and_get_ts, charm, source, base, verbose=verbose
+        )
+        tgt_future = executor.submit(
+            download_and_get_ts, charm, target, base, verbose=verbose
+        )
+        src_ts = src_future.result()
+        tgt_ts = tgt_future.result()
 
     matched = get_prs(base_branch, charm, src_ts, tgt_ts, repo, verbose=verbose)
     for pr in matched:
@@ -149,20 +234,25 @@ def list_prs(charm, source, target, base, base_branch, repo, verbose):
 )
 def charm_rel(source, target, base, charms, apply, verbose):
     """Release charm revisions from a source channel to a target channel."""
-    for charm in charms:
+    _charm_rel_impl(source, target, base, charms, apply, verbose=verbose)
+
+
+def _charm_rel_impl(source, target, base, charms, apply, verbose=False):
+    if verbose and charms:
+        click.echo(f"Fetching charmcraft status for {', '.join(charms)}...")
+    statuses = fetch_charmcraft_statuses(charms)
+
+    releases = []
+    for charm, status_data in zip(charms, statuses):
         print(f"\n--- {charm} ---")
         if not apply:
             print("Dry run mode: no changes will be made.")
 
-        try:
-            if verbose:
-                click.echo(f"Fetching charmcraft status for {charm}...")
-            status_data = run_charmcraft_status(charm)
-            if verbose:
-                click.echo(f"  Got {len(status_data)} track entries")
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
-            print(f"Could not get status for charm {charm}: {e}")
+        if isinstance(status_data, Exception):
+            print(f"Could not get status for charm {charm}: {status_data}")
             continue
+        if verbose:
+            click.echo(f"  Got {len(status_data)} track entries")
 
         revisions = []
         for entry in status_data:
@@ -191,12 +281,20 @@ def charm_rel(source, target, base, charms, apply, verbose):
         for revision in revisions:
             if apply:
                 print(f"Releasing {charm} {revision} to {target}...")
-                try:
-                    subprocess.run(
-                        ["charmcraft", "release", "-r", revision, "-c", target, charm],
-                        check=True,
-                    )
-                except subprocess.CalledProcessError as e:
-                    print(f"Failed to release charm {charm} revision {revision}: {e}")
             else:
                 print(f"  would release {charm} {revision} to {target}")
+        if apply and revisions:
+            releases.append((charm, revisions))
+
+    if not releases:
+        return
+
+    print("\n--- release results ---")
+    for (charm, revisions), errors in zip(
+        releases, release_charm_revisions(releases, target)
+    ):
+        for revision, error in zip(revisions, errors):
+            if error is None:
+                print(f"Released {charm} {revision} to {target}")
+            else:
+                print(f"Failed to release charm {charm} revision {revision}: {error}")
@@ -7,6 +7,11 @@ from typing import Any
 import click
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
 STATE_ENV_VAR = "CEPHTOOLS_STATE_HOME"
 
 
@@ -38,7 +43,7 @@ def load_nested_yaml(path: Path) -> dict[str, Any]:
         raise click.ClickException(f"Expected state file at {target}") from exc
 
     try:
-        parsed = yaml.safe_load(raw)
+        parsed = yaml.load(raw, Loader=_SafeLoader)
         data = {} if parsed is None else parsed
     except yaml.YAMLError as exc:
         raise click.ClickException(f"Failed to parse YAML in {target}: {exc}") from exc
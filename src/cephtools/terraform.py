@@ -12,6 +12,8 @@ from cephtools.common import ensure_snap, run
 
 TERRAGRUNT_VERSION = "v0.89.3"
 DEFAULT_TERRAFORM_ROOT = Path("~/src/cephtools/terraform").expanduser()
+# Resolved once: the source checkout location does not change at runtime.
+PACKAGE_TERRAFORM_ROOT = Path(__file__).resolve().parents[2] / "terraform"
 
 
 def ensure_terragrunt(
@@ -64,8 +66,7 @@ def terraform_root_candidates() -> list[Path]:
     parents: Iterable[Path] = (cwd, *cwd.parents)
     candidates.extend(parent / "terraform" for parent in parents)
 
-    package_root = Path(__file__).resolve().parents[2] / "terraform"
-    candidates.append(package_root)
+    candidates.append(PACKAGE_TERRAFORM_ROOT)
 
     default_root = DEFAULT_TERRAFORM_ROOT
     if default_root not in candidates:
@@ -131,7 +132,8 @@ def resolve_plan_dir(plan: str, *, plan_relative: Path | None = None) -> Path:
                 continue
             seen.add(resolved)
             checked.append(resolved)
-            if resolved.is_dir() and (resolved / "terragrunt.hcl").exists():
+            # a regular terragrunt.hcl implies its parent is a directory
+            if (resolved / "terragrunt.hcl").is_file():
                 return resolved
 
     locations = "\n  - ".join(str(path) for path in checked) or "<none>"
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
 import json
 import os
 import re
@@ -405,7 +406,9 @@ def _ensure_juju_model(
         ) from exc
 
 
+@functools.lru_cache(maxsize=1)
 def primary_ip() -> str:
+    """Return the host's primary IPv4 address (probed once per process)."""
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
@@ -3308,7 +3311,7 @@ def cli(
         maas_vm_image=maas_vm_image,
         maas_lxd_project=MAAS_LXD_PROJECT,
         vmhost=MAAS_VM_HOST,
-        ip=primary_ip(),
+        ip=ctx.obj.get("ip") or primary_ip(),
     )
     ctx.obj["maas_url"] = f"http://{ctx.obj['ip']}:5240/MAAS"
 
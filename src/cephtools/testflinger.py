@@ -7,6 +7,7 @@ import shlex
 import subprocess
 import uuid
 from collections import deque
+from itertools import islice
 from pathlib import Path
 from typing import Callable, Iterable
 
@@ -34,14 +35,14 @@ SSH_KEY_REF_PREFIXES = {"lp", "gh"}
 Runner = Callable[..., subprocess.CompletedProcess]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class BackendConfig:
     launchpad_account: str
     job_tag: str | None = None
     mattermost_name: str | None = None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class ReservationDetails:
     job_id: str
     queue_name: str
@@ -149,6 +150,34 @@ def read_testenv_credentials(path: Path | None = None) -> dict[str, object]:
         ) from exc
 
 
+def _load_machines(profile: str) -> list:
+    cmd = [
+        "maas",
+        profile,
+        "machines",
+        "read",
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except subprocess.CalledProcessError as exc:
+        stderr = exc.stderr.strip() if exc.stderr else "unknown error"
+        raise click.ClickException(f"Failed to query MAAS machines: {stderr}") from exc
+
+    try:
+        machines = json.loads(result.stdout)
+    except json.JSONDecodeError as exc:
+        raise click.ClickException("Failed to parse MAAS machines JSON.") from exc
+
+    if not isinstance(machines, list):
+        raise click.ClickException("Unexpected MAAS machines response format.")
+    return machines
+
+
 def machine_ids(count: int, offset: int = 0) -> list[str]:
     if count <= 0:
         raise click.ClickException("count must be a positive integer.")
@@ -180,30 +209,7 @@ def machine_ids(count: int, offset: int = 0) -> list[str]:
 
     read_testenv_network_config()  # ensure file exists/valid; not directly used here.
 
-    cmd = [
-        "maas",
-        profile,
-        "machines",
-        "read",
-    ]
-    try:
-        result = subprocess.run(
-            cmd,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-    except subprocess.CalledProcessError as exc:
-        stderr = exc.stderr.strip() if exc.stderr else "unknown error"
-        raise click.ClickException(f"Failed to query MAAS machines: {stderr}") from exc
-
-    try:
-        machines = json.loads(result.stdout)
-    except json.JSONDecodeError as exc:
-        raise click.ClickException("Failed to parse MAAS machines JSON.") from exc
-
-    if not isinstance(machines, list):
-        raise click.ClickException("Unexpected MAAS machines response format.")
+    machines = _load_machines(profile)
 
     if offset >= len(machines):
         return []
@@ -355,7 +361,8 @@ def write_job_file(config: BackendConfig, queue_name: str, reserve_for: int) ->
 
 
 def parse_submit_output(stdout: str) -> str:
-    lines = [line.strip() for line in stdout.splitlines() if line.strip()]
+    # Only the first two non-blank lines matter; stop scanning once found.
+    lines = list(islice(filter(None, map(str.strip, stdout.splitlines())), 2))
     if len(lines) < 2 or lines[0] != "Job submitted successfully!":
         raise click.ClickException(
             "Unexpected output from testflinger submit:\n" + stdout
@@ -7,22 +7,27 @@ import pytest
 from click.testing import CliRunner
 
 from cephtools.reltool import (
+    _charm_rel_impl,
     charm_rel,
     download_and_get_ts,
+    fetch_charmcraft_statuses,
     get_prs,
+    list_prs,
     run_charmcraft_status,
+    run_gh_pr_list,
 )
+from cephtools import reltool
 
 
-@patch("cephtools.reltool.run_gh_pr_list")
-def test_get_prs(mock_run_gh_pr_list):
-    """Verify that get_prs filters PRs correctly."""
+@pytest.fixture(autouse=True)
+def reset_ensured_dirs(monkeypatch):
+    monkeypatch.setattr(reltool, "_ensured_dirs", set())
 
-    charm_name = "my-charm"
-    start_ts = datetime(2025, 7, 1, tzinfo=timezone.utc)
-    end_ts = datetime(2025, 7, 31, tzinfo=timezone.utc)
 
-    mock_prs_data = [
+@pytest.fixture(scope="module")
+def base_prs():
+    """Closed PRs shared by the get_prs cases; comments refer to July 2025."""
+    return [
         # 1. Should match: closed in range, file path matches charm
         {
             "number": 1,
@@ -88,27 +93,78 @@ def test_get_prs(mock_run_gh_pr_list):
             "files": [{"path": "my-charm/src/charm.py"}],
         },
     ]
-    mock_run_gh_pr_list.return_value = mock_prs_data
 
-    matched_prs = get_prs("main", charm_name, start_ts, end_ts, "/fake/repo")
+
+@pytest.mark.parametrize(
+    ("start_ts", "end_ts", "expected_numbers"),
+    [
+        (
+            datetime(2025, 7, 1, tzinfo=timezone.utc),
+            datetime(2025, 7, 31, tzinfo=timezone.utc),
+            [1, 6, 7],
+        ),
+        (
+            datetime(2025, 6, 1, tzinfo=timezone.utc),
+            datetime(2025, 7, 15, 10, tzinfo=timezone.utc),
+            [1, 2, 8],
+        ),
+        (
+            datetime(2025, 9, 1, tzinfo=timezone.utc),
+            datetime(2025, 9, 30, tzinfo=timezone.utc),
+            [],
+        ),
+    ],
+)
+@patch("cephtools.reltool.run_gh_pr_list")
+def test_get_prs(mock_run_gh_pr_list, base_prs, start_ts, end_ts, expected_numbers):
+    """Verify that get_prs filters PRs correctly."""
+    mock_run_gh_pr_list.return_value = base_prs
+
+    matched_prs = get_prs("main", "my-charm", start_ts, end_ts, "/fake/repo")
 
     mock_run_gh_pr_list.assert_called_once_with("main", "/fake/repo")
 
-    assert len(matched_prs) == 3
     pr_numbers = [pr["number"] for pr in matched_prs]
-    assert pr_numbers == [1, 6, 7]
+    assert pr_numbers == expected_numbers
+
+
+@patch("cephtools.reltool.run_gh_pr_list")
+def test_get_prs_non_canonical_timestamps(mock_run_gh_pr_list):
+    """Verify that get_prs falls back to parsing non-Z timestamps."""
+    start_ts = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    end_ts = datetime(2025, 7, 31, tzinfo=timezone.utc)
+    mock_run_gh_pr_list.return_value = [
+        {
+            "number": 1,
+            "title": "Offset timestamp",
+            "url": "url1",
+            "closedAt": "2025-07-15T12:00:00+02:00",
+            "files": [{"path": "my-charm/src/charm.py"}],
+        },
+        {
+            "number": 2,
+            "title": "Offset timestamp out of range",
+            "url": "url2",
+            "closedAt": "2025-07-01T01:00:00+02:00",
+            "files": [{"path": "my-charm/src/charm.py"}],
+        },
+    ]
+
+    matched_prs = get_prs("main", "my-charm", start_ts, end_ts, "/fake/repo")
+
+    assert [pr["number"] for pr in matched_prs] == [1]
 
 
 @patch("cephtools.reltool.os.remove")
 @patch("cephtools.reltool.zipfile.ZipFile")
 @patch("cephtools.reltool.subprocess.check_call")
-@patch("cephtools.reltool.tempfile.NamedTemporaryFile")
+@patch("cephtools.reltool.uuid.uuid4")
 @patch("cephtools.reltool.os.path.expanduser")
 @patch("cephtools.reltool.os.makedirs")
 def test_download_and_get_ts(
     mock_makedirs,
     mock_expanduser,
-    mock_named_temp_file,
+    mock_uuid4,
     mock_check_call,
     mock_zipfile,
     mock_os_remove,
@@ -118,23 +174,21 @@ def test_download_and_get_ts(
     channel = "stable"
     base = "ubuntu@22.04"
     juju_tmp = "/fake/juju/tmp"
-    tmp_charm_path = f"{juju_tmp}/tmpfile.charm"
+    tmp_charm_path = f"{juju_tmp}/cephtools-0123abcd.charm"
     commit_date_str = "2025-07-07T12:00:00+00:00"
     expected_ts = datetime.fromisoformat(commit_date_str)
 
     mock_expanduser.return_value = juju_tmp
 
-    # Mock NamedTemporaryFile to return a specific path
-    mock_temp_file_obj = MagicMock()
-    mock_temp_file_obj.name = tmp_charm_path
-    mock_named_temp_file.return_value = mock_temp_file_obj
+    # Pin the generated download name
+    mock_uuid4.return_value.hex = "0123abcd"
 
     # Mock zipfile to simulate reading git-info.txt
     git_info_content = f"commit_date: {commit_date_str}\n"
     mock_zip_file_context = MagicMock()
-    mock_zip_file_context.__enter__.return_value.open.return_value.__enter__.return_value = [
-        line.encode() for line in git_info_content.splitlines(True)
-    ]
+    mock_zip_file_context.__enter__.return_value.read.return_value = (
+        git_info_content.encode()
+    )
     mock_zipfile.return_value = mock_zip_file_context
 
     # Call the function
@@ -143,9 +197,6 @@ def test_download_and_get_ts(
     # Assertions
     mock_expanduser.assert_called_once_with("~/snap/juju/common")
     mock_makedirs.assert_called_once_with(juju_tmp, exist_ok=True)
-    mock_named_temp_file.assert_called_once_with(
-        suffix=".charm", delete=False, dir=juju_tmp
-    )
     mock_check_call.assert_called_once_with(
         [
             "juju",
@@ -166,12 +217,65 @@ def test_download_and_get_ts(
     assert ts == expected_ts
 
 
+@patch("cephtools.reltool.os.makedirs")
+def test_ensure_dir_creates_directory_once(mock_makedirs):
+    """Verify that _ensure_dir only calls makedirs on first use of a path."""
+    reltool._ensure_dir("/fake/juju/tmp")
+    reltool._ensure_dir("/fake/juju/tmp")
+
+    mock_makedirs.assert_called_once_with("/fake/juju/tmp", exist_ok=True)
+
+
+@patch("cephtools.reltool.os.remove")
+@patch("cephtools.reltool.subprocess.check_call")
+@patch("cephtools.reltool.os.makedirs")
+def test_download_and_get_ts_cleans_up_failed_download(
+    mock_makedirs, mock_check_call, mock_os_remove
+):
+    """Verify that a failed juju download still removes the target path."""
+    mock_check_call.side_effect = subprocess.CalledProcessError(1, "juju")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        download_and_get_ts("my-charm", "stable", "ubuntu@22.04")
+
+    dest = mock_check_call.call_args.args[0][-1]
+    mock_os_remove.assert_called_once_with(dest)
+
+
+@patch("cephtools.reltool.subprocess.run")
+def test_run_gh_pr_list(mock_run):
+    """Verify that run_gh_pr_list calls gh and parses the raw json bytes."""
+    mock_proc = MagicMock()
+    mock_proc.stdout = b'[{"number": 1}]'
+    mock_run.return_value = mock_proc
+
+    result = run_gh_pr_list("main", "/fake/repo")
+
+    mock_run.assert_called_once_with(
+        [
+            "gh",
+            "pr",
+            "list",
+            "--base",
+            "main",
+            "--state",
+            "closed",
+            "--json",
+            "number,url,closedAt,title,files",
+        ],
+        check=True,
+        capture_output=True,
+        cwd="/fake/repo",
+    )
+    assert result == [{"number": 1}]
+
+
 @patch("cephtools.reltool.subprocess.run")
 def test_run_charmcraft_status(mock_run):
     """Verify that run_charmcraft_status calls charmcraft and parses json."""
     charm_name = "my-charm"
     mock_proc = MagicMock()
-    mock_proc.stdout = '{"key": "value"}'
+    mock_proc.stdout = b'{"key": "value"}'
     mock_run.return_value = mock_proc
 
     result = run_charmcraft_status(charm_name)
@@ -179,7 +283,6 @@ def test_run_charmcraft_status(mock_run):
     mock_run.assert_called_once_with(
         ["charmcraft", "status", charm_name, "--format", "json"],
         capture_output=True,
-        text=True,
         check=True,
     )
     assert result == {"key": "value"}
@@ -190,7 +293,7 @@ def test_run_charmcraft_status_bad_json(mock_run):
     """Verify that run_charmcraft_status raises JSONDecodeError for bad JSON."""
     charm_name = "my-charm"
     mock_proc = MagicMock()
-    mock_proc.stdout = "this is not json"
+    mock_proc.stdout = b"this is not json"
     mock_run.return_value = mock_proc
 
     with pytest.raises(json.JSONDecodeError):
@@ -206,9 +309,44 @@ def test_run_charmcraft_status_process_error(mock_run):
         run_charmcraft_status(charm_name)
 
 
+@patch("cephtools.reltool.get_prs")
+@patch("cephtools.reltool.download_and_get_ts")
+def test_list_prs(mock_download_and_get_ts, mock_get_prs):
+    """Verify list_prs downloads both channels and prints matching PRs."""
+    src_ts = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    tgt_ts = datetime(2025, 7, 31, tzinfo=timezone.utc)
+    timestamps = {"stable": src_ts, "candidate": tgt_ts}
+    mock_download_and_get_ts.side_effect = lambda charm, channel, base, verbose=False: (
+        timestamps[channel]
+    )
+    mock_get_prs.return_value = [
+        {
+            "number": 1,
+            "title": "Good PR",
+            "url": "url1",
+            "closedAt": "2025-07-15T10:00:00Z",
+        }
+    ]
+
+    runner = CliRunner()
+    result = runner.invoke(
+        list_prs, ["my-charm", "stable", "candidate", "ubuntu@22.04", "main"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert sorted(mock_download_and_get_ts.call_args_list) == [
+        call("my-charm", "candidate", "ubuntu@22.04", verbose=False),
+        call("my-charm", "stable", "ubuntu@22.04", verbose=False),
+    ]
+    mock_get_prs.assert_called_once_with(
+        "main", "my-charm", src_ts, tgt_ts, ".", verbose=False
+    )
+    assert "#1  Good PR" in result.output
+
+
 @patch("cephtools.reltool.subprocess.run")
 @patch("cephtools.reltool.run_charmcraft_status")
-def test_charm_rel(mock_run_charmcraft_status, mock_subprocess_run):
+def test_charm_rel(mock_run_charmcraft_status, mock_subprocess_run, capsys):
     """Verify charm_rel finds and releases charms, handling errors."""
     source = "stable"
     target = "candidate"
@@ -250,26 +388,34 @@ def test_charm_rel(mock_run_charmcraft_status, mock_subprocess_run):
         }
     ]
 
-    mock_run_charmcraft_status.side_effect = [
-        status_charm1,
-        subprocess.CalledProcessError(1, "cmd"),
-        status_charm3,
-        status_charm4,
-    ]
+    # statuses are fetched concurrently, so key the responses by charm
+    statuses = {
+        "charm1": status_charm1,
+        "charm2": subprocess.CalledProcessError(1, "cmd"),
+        "charm3": status_charm3,
+        "charm4": status_charm4,
+    }
 
-    mock_subprocess_run.side_effect = [
-        MagicMock(),  # for charm1 release
-        subprocess.CalledProcessError(1, "cmd"),  # for charm3 release
-    ]
+    def fake_status(charm):
+        result = statuses[charm]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-    runner = CliRunner()
-    result = runner.invoke(charm_rel, [source, target, base, *charms, "--apply"])
+    mock_run_charmcraft_status.side_effect = fake_status
 
-    assert result.exit_code == 0
-    assert result.exception is None
+    # releases also run concurrently: charm1 succeeds, charm3 fails
+    def fake_release(cmd, check):
+        if cmd[-1] == "charm3":
+            raise subprocess.CalledProcessError(1, "cmd")
+        return MagicMock()
+
+    mock_subprocess_run.side_effect = fake_release
+
+    _charm_rel_impl(source, target, base, charms, apply=True)
 
     # check calls to run_charmcraft_status
-    assert mock_run_charmcraft_status.call_args_list == [
+    assert sorted(mock_run_charmcraft_status.call_args_list) == [
         call("charm1"),
         call("charm2"),
         call("charm3"),
@@ -287,10 +433,10 @@ def test_charm_rel(mock_run_charmcraft_status, mock_subprocess_run):
         check=True,
     )
 
-    output = result.output
+    output = capsys.readouterr().out
 
     # charm1 success
-    assert "charm1 101" in output
+    assert "Released charm1 101 to candidate" in output
 
     # charm2 status failure
     assert "Could not get status for charm charm2" in output
@@ -303,11 +449,15 @@ def test_charm_rel(mock_run_charmcraft_status, mock_subprocess_run):
     assert "charm4" in output
     assert "401" not in output
 
+    # output stays in the order the charms were given
+    headers = [output.index(f"--- {charm} ---") for charm in charms]
+    assert headers == sorted(headers)
+
 
 @patch("cephtools.reltool.subprocess.run")
 @patch("cephtools.reltool.run_charmcraft_status")
 def test_charm_rel_dry_run(mock_run_charmcraft_status, mock_subprocess_run):
-    """Verify charm_rel dry-run mode works correctly."""
+    """Verify charm_rel dry-run mode works correctly through the CLI."""
     source = "stable"
     target = "candidate"
     base = "ubuntu@22.04"
@@ -336,3 +486,18 @@ def test_charm_rel_dry_run(mock_run_charmcraft_status, mock_subprocess_run):
 
     output = result.output
     assert "would release charm1 101 to candidate" in output
+
+
+@patch("cephtools.reltool.run_charmcraft_status")
+def test_fetch_charmcraft_statuses_queries_each_charm_once(mock_status):
+    """Verify that repeated charms share a single charmcraft status call."""
+    mock_status.side_effect = lambda charm: [{"charm": charm}]
+
+    statuses = fetch_charmcraft_statuses(("charm1", "charm2", "charm1"))
+
+    assert statuses == [
+        [{"charm": "charm1"}],
+        [{"charm": "charm2"}],
+        [{"charm": "charm1"}],
+    ]
+    assert sorted(mock_status.call_args_list) == [call("charm1"), call("charm2")]
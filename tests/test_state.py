@@ -22,3 +22,11 @@ def test_load_nested_yaml_treats_null_as_empty_mapping(tmp_path: Path) -> None:
     path.write_text("null\n")
 
     assert load_nested_yaml(path) == {}
+
+
+def test_load_nested_yaml_reports_parse_errors(tmp_path: Path) -> None:
+    path = tmp_path / "state.yaml"
+    path.write_text("key: [unterminated\n")
+
+    with pytest.raises(click.ClickException, match="Failed to parse YAML"):
+        load_nested_yaml(path)
@@ -42,3 +42,15 @@ def test_resolve_plan_dir_prefers_env_root(
 
     resolved = terraform.resolve_plan_dir("microceph", plan_relative=Path("microceph"))
     assert resolved == plan_dir
+
+
+def test_resolve_plan_dir_skips_dir_named_terragrunt_hcl(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    env_root = tmp_path / "env-root"
+    (env_root / "microceph" / "terragrunt.hcl").mkdir(parents=True)
+
+    monkeypatch.setattr(terraform, "terraform_root_candidates", lambda: [env_root])
+
+    with pytest.raises(ClickException):
+        terraform.resolve_plan_dir("microceph")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import shutil
 import stat
 import subprocess
 from pathlib import Path
@@ -14,6 +15,61 @@ import jubilant
 from cephtools import testenv
 
 
+CLOUD_YAML = """\
+clouds:
+  maas-cloud:
+    type: maas
+    auth-types: [oauth1]
+    endpoint: http://10.0.0.1:5240/MAAS
+"""
+CRED_YAML = """\
+credentials:
+  maas-cloud:
+    admin:
+      auth-type: oauth1
+      maas-oauth: KEY:VALUE
+"""
+NETWORK_YAML = """\
+network:
+  bridge: lxdbr0
+  cidr: 10.0.0.0/24
+  gateway: 10.0.0.1
+  dynamic_range:
+    start: 10.0.0.100
+    end: 10.0.0.199
+  subnet_id: 1
+  fabric_id: 2
+  vlan_id: 3
+  rack_sysid: rack-1
+  space_id: 4
+  external:
+    bridge: ext
+    cidr: 10.10.0.0/24
+    gateway: 10.10.0.1
+    dynamic_range:
+      start: 10.10.0.100
+      end: 10.10.0.199
+    subnet_id: 10
+    fabric_id: 11
+    vlan_id: 12
+    rack_sysid: rack-2
+    space_id: 13
+"""
+
+
+class _RunResult:
+    def __init__(self, stdout: str = "", stderr: str = "", returncode: int = 0):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+
+
+def _patch_testenv(monkeypatch: pytest.MonkeyPatch, **attrs: object) -> None:
+    """Patch several testenv module attributes in one call."""
+    for name, value in attrs.items():
+        monkeypatch.setattr(testenv, name, value)
+
+
 @pytest.fixture
 def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
     home = tmp_path / "state"
@@ -21,14 +77,40 @@ def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
     return home
 
 
+@pytest.fixture
+def fake_clock(monkeypatch: pytest.MonkeyPatch) -> dict[str, float]:
+    """Drive testenv's time.monotonic/time.sleep from a manual clock."""
+    now = {"value": 0.0}
+
+    def fake_sleep(seconds: float) -> None:
+        now["value"] += seconds
+
+    monkeypatch.setattr(testenv.time, "monotonic", lambda: now["value"])
+    monkeypatch.setattr(testenv.time, "sleep", fake_sleep)
+    return now
+
+
+@pytest.fixture(scope="session")
+def _maas_state_template(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    template = tmp_path_factory.mktemp("maas-state")
+    (template / "cloud.yaml").write_text(CLOUD_YAML)
+    (template / "cred.yaml").write_text(CRED_YAML)
+    (template / "network.yaml").write_text(NETWORK_YAML)
+    return template
+
+
+@pytest.fixture
+def maas_state_home(state_home: Path, _maas_state_template: Path) -> Path:
+    """A private copy of the MAAS cloud, credential and network state files."""
+    shutil.copytree(_maas_state_template, state_home)
+    return state_home
+
+
 def test_get_lxd_vm_host_id(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         assert "vm-hosts read" in cmd
 
-        class Result:
-            stdout = json.dumps([{"name": "local-lxd", "id": 123}])
-
-        return Result()
+        return _RunResult(json.dumps([{"name": "local-lxd", "id": 123}]))
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -38,10 +120,7 @@ def test_get_lxd_vm_host_id(monkeypatch):
 
 def test_get_lxd_vm_host_id_missing(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
-        class Result:
-            stdout = json.dumps([{"name": "other-host", "id": 1}])
-
-        return Result()
+        return _RunResult(json.dumps([{"name": "other-host", "id": 1}]))
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -58,10 +137,7 @@ def test_register_lxd_vmhost_impl_skips_existing(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         calls.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     def fake_echo(message, **kwargs):
         echoes.append(message)
@@ -334,8 +410,8 @@ def test_get_vm_host_architectures(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         assert "vm-hosts read" in cmd
 
-        class Result:
-            stdout = json.dumps(
+        return _RunResult(
+            json.dumps(
                 [
                     {
                         "name": "local-lxd",
@@ -346,8 +422,7 @@ def test_get_vm_host_architectures(monkeypatch):
                     }
                 ]
             )
-
-        return Result()
+        )
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -358,63 +433,43 @@ def test_get_vm_host_architectures(monkeypatch):
     ]
 
 
-def test_wait_for_vm_host_architecture_success(monkeypatch):
+@pytest.mark.parametrize(
+    ("ready_on_call", "timeout", "interval"),
+    [
+        pytest.param(3, 30, 5, id="success"),
+        pytest.param(None, 12, 4, id="timeout"),
+    ],
+)
+def test_wait_for_vm_host_architecture(
+    monkeypatch, fake_clock, ready_on_call, timeout, interval
+):
     calls = {"count": 0}
 
     def fake_get_arches(admin, vmhost):
         calls["count"] += 1
-        if calls["count"] < 3:
+        if ready_on_call is None or calls["count"] < ready_on_call:
             return []
         return [testenv.REQUIRED_BOOT_ARCHITECTURE]
 
-    now = {"value": 0.0}
-
-    def fake_monotonic():
-        return now["value"]
-
-    def fake_sleep(seconds: float):
-        now["value"] += seconds
-
-    monkeypatch.setattr(testenv, "_get_vm_host_architectures", fake_get_arches)
-    monkeypatch.setattr(testenv.time, "monotonic", fake_monotonic)
-    monkeypatch.setattr(testenv.time, "sleep", fake_sleep)
-
-    testenv._wait_for_vm_host_architecture(
-        "admin",
-        "local-lxd",
-        testenv.REQUIRED_BOOT_ARCHITECTURE,
-        timeout=30,
-        interval=5,
-    )
-
-    assert calls["count"] >= 3
-
-
-def test_wait_for_vm_host_architecture_timeout(monkeypatch):
-    def fake_get_arches(admin, vmhost):
-        return []
-
-    now = {"value": 0.0}
-
-    def fake_monotonic():
-        return now["value"]
-
-    def fake_sleep(seconds: float):
-        now["value"] += seconds
-
     monkeypatch.setattr(testenv, "_get_vm_host_architectures", fake_get_arches)
-    monkeypatch.setattr(testenv.time, "monotonic", fake_monotonic)
-    monkeypatch.setattr(testenv.time, "sleep", fake_sleep)
 
-    with pytest.raises(ClickException):
+    def wait():
         testenv._wait_for_vm_host_architecture(
             "admin",
             "local-lxd",
             testenv.REQUIRED_BOOT_ARCHITECTURE,
-            timeout=12,
-            interval=4,
+            timeout=timeout,
+            interval=interval,
         )
 
+    if ready_on_call is None:
+        with pytest.raises(ClickException):
+            wait()
+        assert fake_clock["value"] >= timeout
+    else:
+        wait()
+        assert calls["count"] == ready_on_call
+
 
 def test_install_maas_deb(monkeypatch):
     commands: list[object] = []
@@ -422,10 +477,7 @@ def test_install_maas_deb(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -450,32 +502,22 @@ def test_install_maas_deb(monkeypatch):
 def test_maas_init_impl_configures_postgres_backed_maas(monkeypatch):
     calls: list[object] = []
 
-    monkeypatch.setattr(testenv, "_maas_is_initialized", lambda: False)
-    monkeypatch.setattr(
-        testenv,
-        "_ensure_maas_postgres",
-        lambda password: calls.append(("postgres", password)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_configure_maas_region",
-        lambda maas_url, db_password: calls.append(("region", maas_url, db_password)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_ensure_maas_auth_ready",
-        lambda: calls.append(("auth-ready",)),
+    _patch_testenv(
+        monkeypatch,
+        _maas_is_initialized=lambda: False,
+        _ensure_maas_postgres=lambda password: calls.append(("postgres", password)),
+        _configure_maas_region=lambda maas_url, db_password: calls.append(
+            ("region", maas_url, db_password)
+        ),
+        _ensure_maas_auth_ready=lambda: calls.append(("auth-ready",)),
+        _maas_admin_exists=lambda admin: False,
     )
-    monkeypatch.setattr(testenv, "_maas_admin_exists", lambda admin: False)
     monkeypatch.setattr(testenv.time, "sleep", lambda seconds: None)
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
         calls.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -510,10 +552,7 @@ def test_configure_maas_region_restarts_temporal_services(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         calls.append((cmd, check))
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -562,27 +601,19 @@ def test_lxd_init_impl_stops_and_restarts_bind9(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append((cmd, check, shell))
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
-    monkeypatch.setattr(testenv, "run", fake_run)
-    monkeypatch.setattr(
-        testenv, "_wait_for_bind9_shutdown", lambda: waited.append(True)
-    )
-    monkeypatch.setattr(
-        testenv, "_run_lxd_minimal_init", lambda: init_calls.append(True)
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_network",
-        lambda name, ipv4_address=None: ensured_networks.append(name),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_default_profile_network",
-        lambda name: ensured_profile_networks.append(name),
+    _patch_testenv(
+        monkeypatch,
+        run=fake_run,
+        _wait_for_bind9_shutdown=lambda: waited.append(True),
+        _run_lxd_minimal_init=lambda: init_calls.append(True),
+        ensure_lxd_network=lambda name, ipv4_address=None: ensured_networks.append(
+            name
+        ),
+        ensure_lxd_default_profile_network=lambda name: ensured_profile_networks.append(
+            name
+        ),
     )
     monkeypatch.setattr(testenv.time, "sleep", lambda seconds: sleeps.append(seconds))
     monkeypatch.setattr(
@@ -635,14 +666,14 @@ def test_lxd_init_impl_restarts_bind9_on_failure(monkeypatch):
         if cmd == "sudo snap set lxd daemon.user.group=adm":
             raise RuntimeError("boom")
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
-    monkeypatch.setattr(testenv, "run", fake_run)
-    monkeypatch.setattr(testenv, "_wait_for_bind9_shutdown", lambda: None)
-    monkeypatch.setattr(testenv, "_run_lxd_minimal_init", lambda: None)
+    _patch_testenv(
+        monkeypatch,
+        run=fake_run,
+        _wait_for_bind9_shutdown=lambda: None,
+        _run_lxd_minimal_init=lambda: None,
+    )
 
     with pytest.raises(RuntimeError, match="boom"):
         testenv.lxd_init_impl("10.0.0.1", "lxdbr0")
@@ -668,12 +699,7 @@ def test_wait_for_bind9_shutdown_waits_for_named_exit(monkeypatch):
         else:
             raise AssertionError(cmd)
 
-        class Result:
-            def __init__(self, stdout: str):
-                self.stdout = stdout
-                self.returncode = 0
-
-        return Result(stdout)
+        return _RunResult(stdout)
 
     monkeypatch.setattr(testenv, "run", fake_run)
     monkeypatch.setattr(testenv.time, "monotonic", lambda: now["value"])
@@ -704,19 +730,14 @@ def test_run_lxd_minimal_init_retries_after_failure(monkeypatch):
             if len(init_attempts) == 1:
                 raise subprocess.CalledProcessError(1, cmd)
 
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        return Result()
+        return _RunResult()
 
-    monkeypatch.setattr(testenv, "run", fake_run)
-    monkeypatch.setattr(testenv, "_lxd_is_minimally_initialized", lambda: False)
-    monkeypatch.setattr(
-        testenv, "_log_lxd_port_53_diagnostics", lambda: diagnostics.append(True)
-    )
-    monkeypatch.setattr(
-        testenv, "_wait_for_bind9_shutdown", lambda: waited.append(True)
+    _patch_testenv(
+        monkeypatch,
+        run=fake_run,
+        _lxd_is_minimally_initialized=lambda: False,
+        _log_lxd_port_53_diagnostics=lambda: diagnostics.append(True),
+        _wait_for_bind9_shutdown=lambda: waited.append(True),
     )
     monkeypatch.setattr(testenv.time, "sleep", lambda seconds: sleeps.append(seconds))
     monkeypatch.setattr(
@@ -743,18 +764,15 @@ def test_run_lxd_minimal_init_continues_on_partial_init(monkeypatch):
             init_attempts.append(1)
             raise subprocess.CalledProcessError(1, cmd)
 
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        return Result()
+        return _RunResult()
 
-    monkeypatch.setattr(testenv, "run", fake_run)
-    monkeypatch.setattr(testenv, "_lxd_is_minimally_initialized", lambda: True)
-    monkeypatch.setattr(
-        testenv, "_log_lxd_port_53_diagnostics", lambda: diagnostics.append(True)
+    _patch_testenv(
+        monkeypatch,
+        run=fake_run,
+        _lxd_is_minimally_initialized=lambda: True,
+        _log_lxd_port_53_diagnostics=lambda: diagnostics.append(True),
+        _wait_for_bind9_shutdown=lambda: None,
     )
-    monkeypatch.setattr(testenv, "_wait_for_bind9_shutdown", lambda: None)
     monkeypatch.setattr(testenv.time, "sleep", lambda seconds: sleeps.append(seconds))
     monkeypatch.setattr(
         testenv.click, "echo", lambda message, **kwargs: echoes.append(message)
@@ -772,8 +790,8 @@ def test_bind9_ipv4_listen_addresses(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         assert cmd == ["ip", "-j", "-4", "addr", "show"]
 
-        class Result:
-            stdout = json.dumps(
+        return _RunResult(
+            json.dumps(
                 [
                     {
                         "ifname": "lo",
@@ -793,8 +811,7 @@ def test_bind9_ipv4_listen_addresses(monkeypatch):
                     },
                 ]
             )
-
-        return Result()
+        )
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -810,10 +827,7 @@ def test_configure_maas_bind9_ipv4(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(
         testenv,
@@ -846,10 +860,7 @@ def test_ensure_lxd_network_creates_without_dns_or_dhcp(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = "[]" if cmd == "lxc query /1.0/networks" else ""
-
-        return Result()
+        return _RunResult("[]" if cmd == "lxc query /1.0/networks" else "")
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -871,10 +882,7 @@ def test_ensure_lxd_network_updates_existing_network(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = json.dumps(["/1.0/networks/lxdbr0"])
-
-        return Result()
+        return _RunResult(json.dumps(["/1.0/networks/lxdbr0"]))
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -895,10 +903,7 @@ def test_ensure_lxd_host_network_creates_with_dns_and_dhcp(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = "[]" if cmd == "lxc query /1.0/networks" else ""
-
-        return Result()
+        return _RunResult("[]" if cmd == "lxc query /1.0/networks" else "")
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -920,10 +925,7 @@ def test_ensure_lxd_host_network_clears_stale_dnsmasq_override(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = json.dumps(["/1.0/networks/lxdbr0"])
-
-        return Result()
+        return _RunResult(json.dumps(["/1.0/networks/lxdbr0"]))
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -956,30 +958,15 @@ def test_render_maas_vm_bootstrap_script_uses_maas_snap():
 def test_lxd_init_vm_impl_does_not_touch_bind9(monkeypatch):
     calls: list[tuple[str, object]] = []
 
-    monkeypatch.setattr(
-        testenv,
-        "_configure_lxd_common",
-        lambda: calls.append(("common", None)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_host_network",
-        lambda name: calls.append(("host-network", name)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_default_profile_network",
-        lambda name: calls.append(("profile", name)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_maas_network",
-        lambda name: calls.append(("maas-network", name)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_maas_project",
-        lambda project, network: calls.append(("project", (project, network))),
+    _patch_testenv(
+        monkeypatch,
+        _configure_lxd_common=lambda: calls.append(("common", None)),
+        ensure_lxd_host_network=lambda name: calls.append(("host-network", name)),
+        ensure_lxd_default_profile_network=lambda name: calls.append(("profile", name)),
+        ensure_lxd_maas_network=lambda name: calls.append(("maas-network", name)),
+        ensure_lxd_maas_project=lambda project, network: calls.append(
+            ("project", (project, network))
+        ),
     )
     monkeypatch.setattr(
         testenv.time, "sleep", lambda seconds: calls.append(("sleep", seconds))
@@ -1000,20 +987,11 @@ def test_lxd_init_vm_impl_does_not_touch_bind9(monkeypatch):
 def test_lxd_init_lxd_impl_creates_ext_as_host_network(monkeypatch):
     calls: list[tuple[str, object]] = []
 
-    monkeypatch.setattr(
-        testenv,
-        "_configure_lxd_common",
-        lambda: calls.append(("common", None)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_host_network",
-        lambda name: calls.append(("host-network", name)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_lxd_default_profile_network",
-        lambda name: calls.append(("profile", name)),
+    _patch_testenv(
+        monkeypatch,
+        _configure_lxd_common=lambda: calls.append(("common", None)),
+        ensure_lxd_host_network=lambda name: calls.append(("host-network", name)),
+        ensure_lxd_default_profile_network=lambda name: calls.append(("profile", name)),
     )
     monkeypatch.setattr(
         testenv.time, "sleep", lambda seconds: calls.append(("sleep", seconds))
@@ -1036,10 +1014,7 @@ def test_ensure_lxd_default_profile_network_adds_eth0(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = json.dumps({"devices": {"root": {"type": "disk"}}})
-
-        return Result()
+        return _RunResult(json.dumps({"devices": {"root": {"type": "disk"}}}))
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1067,16 +1042,15 @@ def test_ensure_lxd_default_profile_network_updates_existing_eth0(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = json.dumps(
+        return _RunResult(
+            json.dumps(
                 {
                     "devices": {
                         "eth0": {"type": "nic", "network": "oldnet", "name": "eth0"}
                     }
                 }
             )
-
-        return Result()
+        )
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1103,17 +1077,9 @@ def test_verify_maas_checks_systemd_services(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        if cmd == ["sudo", "systemctl", "is-active", "--quiet", "maas-regiond"]:
-            Result.returncode = 0
-        elif cmd == ["sudo", "systemctl", "is-active", "--quiet", "maas-rackd"]:
-            Result.returncode = 0
-        elif cmd == "maas admin boot-resources read":
-            Result.stdout = "[]"
-        return Result()
+        if cmd == "maas admin boot-resources read":
+            return _RunResult("[]")
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1128,15 +1094,9 @@ def test_verify_maas_checks_systemd_services(monkeypatch):
 
 def test_verify_maas_raises_when_service_inactive(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        if cmd == ["sudo", "systemctl", "is-active", "--quiet", "maas-regiond"]:
-            Result.returncode = 0
-        elif cmd == ["sudo", "systemctl", "is-active", "--quiet", "maas-rackd"]:
-            Result.returncode = 3
-        return Result()
+        if cmd == ["sudo", "systemctl", "is-active", "--quiet", "maas-rackd"]:
+            return _RunResult(returncode=3)
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1169,10 +1129,7 @@ def test_dns_preflight_restarts_resolver(monkeypatch):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(str(cmd))
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
     monkeypatch.setattr(testenv, "_resolve_hostname", lambda host: True)
@@ -1183,28 +1140,16 @@ def test_dns_preflight_restarts_resolver(monkeypatch):
     assert "sudo systemctl restart systemd-resolved || true" in commands
 
 
-def test_dns_preflight_raises_when_unresolved(monkeypatch):
+def test_dns_preflight_raises_when_unresolved(monkeypatch, fake_clock):
     commands: list[str] = []
-    now = {"value": 0.0}
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(str(cmd))
 
-        class Result:
-            stdout = ""
-
-        return Result()
-
-    def fake_monotonic():
-        return now["value"]
-
-    def fake_sleep(seconds: float):
-        now["value"] += seconds
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
     monkeypatch.setattr(testenv, "_resolve_hostname", lambda host: False)
-    monkeypatch.setattr(testenv.time, "monotonic", fake_monotonic)
-    monkeypatch.setattr(testenv.time, "sleep", fake_sleep)
 
     with pytest.raises(ClickException, match="unresolved hosts: registry.terraform.io"):
         testenv.dns_preflight(hosts=("registry.terraform.io",), timeout=2, interval=1)
@@ -1226,11 +1171,7 @@ def _run_configure_lxd_juju_network(monkeypatch, spaces_json: str):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         calls.append((cmd, check))
 
-        class Result:
-            stdout = spaces_json if cmd[:2] == ["juju", "spaces"] else ""
-            returncode = 0
-
-        return Result()
+        return _RunResult(spaces_json if cmd[:2] == ["juju", "spaces"] else "")
 
     monkeypatch.setattr(testenv, "run", fake_run)
     monkeypatch.setattr(testenv, "lxd_network_cidr_and_gateway", _fake_lxd_network)
@@ -1308,24 +1249,22 @@ def test_create_lxd_nodes_impl_adds_machines_and_block_volumes(
 ) -> None:
     commands: list[object] = []
 
-    monkeypatch.setattr(testenv, "_juju_machine_instance_ids", lambda *_: {})
-    monkeypatch.setattr(
-        testenv,
-        "_wait_for_lxd_juju_machines",
-        lambda *_args, **_kwargs: {"0": "juju-vm-0", "1": "juju-vm-1"},
+    _patch_testenv(
+        monkeypatch,
+        _juju_machine_instance_ids=lambda *_: {},
+        _wait_for_lxd_juju_machines=lambda *_args, **_kwargs: {
+            "0": "juju-vm-0",
+            "1": "juju-vm-1",
+        },
+        _default_lxd_storage_pool=lambda: "default",
+        _lxd_storage_volume_exists=lambda *_args: False,
+        _lxd_instance_device_names=lambda *_args: set(),
     )
-    monkeypatch.setattr(testenv, "_default_lxd_storage_pool", lambda: "default")
-    monkeypatch.setattr(testenv, "_lxd_storage_volume_exists", lambda *_args: False)
-    monkeypatch.setattr(testenv, "_lxd_instance_device_names", lambda *_args: set())
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1374,32 +1313,21 @@ def test_destroy_lxd_nodes_impl_detaches_disks_removes_volumes_and_machines(
 ) -> None:
     commands: list[object] = []
 
-    monkeypatch.setattr(
-        testenv,
-        "_juju_machine_instance_ids",
-        lambda *_args: {"1": "juju-vm-1", "0": "juju-vm-0"},
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_lxd_instance_device_names",
-        lambda instance: {"root", "osd-1", "osd-0"}
+    _patch_testenv(
+        monkeypatch,
+        _juju_machine_instance_ids=lambda *_args: {"1": "juju-vm-1", "0": "juju-vm-0"},
+        _lxd_instance_device_names=lambda instance: {"root", "osd-1", "osd-0"}
         if instance == "juju-vm-0"
         else {"root", "osd-0"},
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_lxd_osd_volumes",
-        lambda: testenv.CleanupPhaseResult("delete LXD OSD volumes", "ok", "removed"),
+        _cleanup_lxd_osd_volumes=lambda: testenv.CleanupPhaseResult(
+            "delete LXD OSD volumes", "ok", "removed"
+        ),
     )
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-            returncode = 0
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1493,8 +1421,30 @@ def test_cleanup_lxd_osd_volumes_dry_run_describes_exact_pattern() -> None:
     assert "prefixed" not in result.detail
 
 
+# Canned MAAS/terragrunt responses for the create-nodes flow.
+_VMHOSTS_READ = json.dumps([{"name": "local-lxd", "id": 321}])
+_TERRAGRUNT_OUTPUT = json.dumps({"vm_hostnames": {"value": ["ceph-01"]}})
+_TAG_MACHINES = json.dumps(
+    [{"hostname": "ceph-01", "system_id": "node-1", "status_name": "Deployed"}]
+)
+_MACHINES_READ = json.dumps([{"hostname": "ceph-01", "system_id": "node-1"}])
+_BLOCK_DEVICES = json.dumps(
+    [
+        {"id": 0, "used_for": "GPT partitioned"},
+        {"id": 1, "used_for": "Unused", "tags": []},
+    ]
+)
+
+_CREATE_NODES_EXACT = {
+    "maas admin tag machines cephtools": _TAG_MACHINES,
+    "maas admin machines read": _MACHINES_READ,
+    "maas admin tags read": "[]",
+}
+_CREATE_NODES_PREFIXES = (("maas admin block-devices read", _BLOCK_DEVICES),)
+
+
 def test_create_nodes_impl_invokes_terragrunt(
-    monkeypatch, tmp_path: Path, state_home: Path
+    monkeypatch, tmp_path: Path, maas_state_home: Path
 ):
     calls: list[str] = []
     machine_updates: list[str] = []
@@ -1506,150 +1456,24 @@ def test_create_nodes_impl_invokes_terragrunt(
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
         if "vm-hosts read" in cmd:
-
-            class Result:
-                stdout = json.dumps([{"name": "local-lxd", "id": 321}])
-
-            return Result()
-
-        if "terragrunt output -json" in cmd:
-            calls.append(cmd)
-
-            class Result:
-                stdout = json.dumps({"vm_hostnames": {"value": ["ceph-01"]}})
-
-            return Result()
-
-        if cmd == "maas admin tag machines cephtools":
-            calls.append(cmd)
-
-            class Result:
-                stdout = json.dumps(
-                    [
-                        {
-                            "hostname": "ceph-01",
-                            "system_id": "node-1",
-                            "status_name": "Deployed",
-                        }
-                    ]
-                )
-
-            return Result()
-
-        if cmd == "maas admin machines read":
-            calls.append(cmd)
-
-            class Result:
-                stdout = json.dumps([{"hostname": "ceph-01", "system_id": "node-1"}])
-
-            return Result()
-
-        if cmd.startswith("maas admin block-devices read"):
-            calls.append(cmd)
-
-            class Result:
-                stdout = json.dumps(
-                    [
-                        {"id": 0, "used_for": "GPT partitioned"},
-                        {"id": 1, "used_for": "Unused", "tags": []},
-                    ]
-                )
-
-            return Result()
-
-        if cmd.startswith("maas admin machine release"):
-            calls.append(cmd)
-
-            class Result:
-                stdout = ""
-
-            return Result()
-
-        if cmd == "maas admin tags read":
-            calls.append(cmd)
-
-            class Result:
-                stdout = "[]"
-
-            return Result()
-
-        if cmd.startswith("maas admin tags create"):
-            calls.append(cmd)
-
-            class Result:
-                stdout = ""
-
-            return Result()
-
-        if cmd.startswith("maas admin block-device add-tag"):
-            calls.append(cmd)
-
-            class Result:
-                stdout = ""
-
-            return Result()
-
+            return _RunResult(_VMHOSTS_READ)
         if cmd.startswith("maas admin tag update-nodes"):
             machine_updates.append(cmd)
-
-            class Result:
-                stdout = ""
-
-            return Result()
-
+            return _RunResult()
         if "terragrunt apply" in cmd:
             apply_calls.append(cmd)
 
         calls.append(cmd)
-
-        class Result:
-            stdout = ""
-
-        return Result()
+        if cmd in _CREATE_NODES_EXACT:
+            return _RunResult(_CREATE_NODES_EXACT[cmd])
+        if "terragrunt output -json" in cmd:
+            return _RunResult(_TERRAGRUNT_OUTPUT)
+        for prefix, stdout in _CREATE_NODES_PREFIXES:
+            if cmd.startswith(prefix):
+                return _RunResult(stdout)
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
-    state_home.mkdir(parents=True, exist_ok=True)
-
-    (state_home / "cloud.yaml").write_text(
-        "clouds:\n"
-        "  maas-cloud:\n"
-        "    type: maas\n"
-        "    auth-types: [oauth1]\n"
-        "    endpoint: http://10.0.0.1:5240/MAAS\n"
-    )
-    (state_home / "cred.yaml").write_text(
-        "credentials:\n"
-        "  maas-cloud:\n"
-        "    admin:\n"
-        "      auth-type: oauth1\n"
-        "      maas-oauth: KEY:VALUE\n"
-    )
-    (state_home / "network.yaml").write_text(
-        "network:\n"
-        "  bridge: lxdbr0\n"
-        "  cidr: 10.0.0.0/24\n"
-        "  gateway: 10.0.0.1\n"
-        "  dynamic_range:\n"
-        "    start: 10.0.0.100\n"
-        "    end: 10.0.0.199\n"
-        "  subnet_id: 1\n"
-        "  fabric_id: 2\n"
-        "  vlan_id: 3\n"
-        "  rack_sysid: rack-1\n"
-        "  space_id: 4\n"
-        "  external:\n"
-        "    bridge: ext\n"
-        "    cidr: 10.10.0.0/24\n"
-        "    gateway: 10.10.0.1\n"
-        "    dynamic_range:\n"
-        "      start: 10.10.0.100\n"
-        "      end: 10.10.0.199\n"
-        "    subnet_id: 10\n"
-        "    fabric_id: 11\n"
-        "    vlan_id: 12\n"
-        "    rack_sysid: rack-2\n"
-        "    space_id: 13\n"
-    )
 
     testenv._create_nodes_impl(
         {"admin": "admin", "vmhost": "local-lxd"},
@@ -1664,9 +1488,8 @@ def test_create_nodes_impl_invokes_terragrunt(
     assert "-parallelism=1" in apply_command
     assert "-var" not in apply_command
 
-    assert any("terragrunt output -json" in command for command in calls), (
-        "Terragrunt output not inspected"
-    )
+    joined_calls = "\n".join(calls)
+    assert "terragrunt output -json" in joined_calls, "Terragrunt output not inspected"
     assert "maas admin tags create name=cephtools" in calls
     assert "maas admin block-devices read node-1" in calls
     assert "maas admin block-device add-tag node-1 1 tag=osd" in calls
@@ -1698,10 +1521,7 @@ def test_destroy_nodes_impl_runs_terragrunt(monkeypatch, tmp_path: Path):
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -1745,9 +1565,28 @@ def test_resolve_terragrunt_dir_from_terraform_root_environment(
     assert resolved == terragrunt_dir
 
 
-def test_ensure_juju_model_creates_and_sets_constraints(monkeypatch):
+_MODELS_EMPTY = json.dumps({"models": []})
+_MODELS_WITH_CEPHTOOLS = json.dumps({"models": [{"name": "cephtools"}]})
+
+
+@pytest.mark.parametrize(
+    ("models_json", "controller", "constraint", "creates"),
+    [
+        pytest.param(_MODELS_EMPTY, None, "tags=cephtools", True, id="creates"),
+        pytest.param(
+            _MODELS_EMPTY,
+            testenv.LXD_CONTROLLER,
+            "virt-type=virtual-machine",
+            True,
+            id="accepts-controller-and-constraint",
+        ),
+        pytest.param(
+            _MODELS_WITH_CEPHTOOLS, None, "tags=cephtools", False, id="skips-existing"
+        ),
+    ],
+)
+def test_ensure_juju_model(monkeypatch, models_json, controller, constraint, creates):
     calls: list[tuple] = []
-    models_payload = {"models": []}
 
     class FakeJuju:
         def __init__(self, model: str | None = None, **_: object) -> None:
@@ -1756,7 +1595,7 @@ def test_ensure_juju_model_creates_and_sets_constraints(monkeypatch):
         def cli(self, *args: str, include_model: bool = True, **__: object) -> str:
             calls.append(("cli", self.model, args, include_model))
             if args and args[0] == "models":
-                return json.dumps(models_payload)
+                return models_json
             return ""
 
         def add_model(self, model: str, **kwargs: object) -> None:
@@ -1767,110 +1606,45 @@ def test_ensure_juju_model_creates_and_sets_constraints(monkeypatch):
         testenv.jubilant, "Juju", lambda *args, **kwargs: FakeJuju(*args, **kwargs)
     )
 
-    testenv._ensure_juju_model("cephtools", constraint="tags=cephtools")
+    if controller is None:
+        testenv._ensure_juju_model("cephtools", constraint=constraint)
+        controller = testenv.MAAS_CONTROLLER
+    else:
+        testenv._ensure_juju_model(
+            "cephtools", controller=controller, constraint=constraint
+        )
 
-    assert calls == [
-        (
-            "cli",
-            None,
-            ("models", "--format", "json", "--controller", testenv.MAAS_CONTROLLER),
-            False,
-        ),
-        ("add_model", "cephtools", {"controller": testenv.MAAS_CONTROLLER}),
+    expected: list[tuple] = [
+        ("cli", None, ("models", "--format", "json", "--controller", controller), False)
+    ]
+    if creates:
+        expected.append(("add_model", "cephtools", {"controller": controller}))
+    expected.append(
         (
             "cli",
-            f"{testenv.MAAS_CONTROLLER}:cephtools",
-            ("set-model-constraints", "tags=cephtools"),
+            f"{controller}:cephtools",
+            ("set-model-constraints", constraint),
             True,
-        ),
-    ]
-
-
-def test_ensure_juju_model_accepts_controller_and_constraint(monkeypatch):
-    calls: list[tuple] = []
-    models_payload = {"models": []}
+        )
+    )
+    assert calls == expected
 
-    class FakeJuju:
-        def __init__(self, model: str | None = None, **_: object) -> None:
-            self.model = model
 
-        def cli(self, *args: str, include_model: bool = True, **__: object) -> str:
-            calls.append(("cli", self.model, args, include_model))
-            if args and args[0] == "models":
-                return json.dumps(models_payload)
-            return ""
+class DummyJuju:
+    __slots__ = (
+        "clouds",
+        "credentials",
+        "controllers",
+        "clouds_payload",
+        "add_cloud_calls",
+        "add_credential_calls",
+        "bootstrap_calls",
+        "bootstrap_kwargs",
+        "switch_calls",
+        "add_cloud_error",
+        "add_credential_error",
+    )
 
-        def add_model(self, model: str, **kwargs: object) -> None:
-            calls.append(("add_model", model, kwargs))
-
-    monkeypatch.setattr(
-        testenv.jubilant, "Juju", lambda *args, **kwargs: FakeJuju(*args, **kwargs)
-    )
-
-    testenv._ensure_juju_model(
-        "cephtools",
-        controller=testenv.LXD_CONTROLLER,
-        constraint="virt-type=virtual-machine",
-    )
-
-    assert calls == [
-        (
-            "cli",
-            None,
-            ("models", "--format", "json", "--controller", testenv.LXD_CONTROLLER),
-            False,
-        ),
-        ("add_model", "cephtools", {"controller": testenv.LXD_CONTROLLER}),
-        (
-            "cli",
-            f"{testenv.LXD_CONTROLLER}:cephtools",
-            ("set-model-constraints", "virt-type=virtual-machine"),
-            True,
-        ),
-    ]
-
-
-def test_ensure_juju_model_skips_existing(monkeypatch):
-    calls: list[tuple] = []
-    models_payload = {"models": [{"name": "cephtools"}]}
-
-    class FakeJuju:
-        def __init__(self, model: str | None = None, **_: object) -> None:
-            self.model = model
-
-        def cli(self, *args: str, include_model: bool = True, **__: object) -> str:
-            calls.append(("cli", self.model, args, include_model))
-            if args and args[0] == "models":
-                return json.dumps(models_payload)
-            return ""
-
-        def add_model(self, model: str, **kwargs: object) -> None:
-            self.model = model
-            calls.append(("add_model", model, kwargs))
-
-    monkeypatch.setattr(
-        testenv.jubilant, "Juju", lambda *args, **kwargs: FakeJuju(*args, **kwargs)
-    )
-
-    testenv._ensure_juju_model("cephtools", constraint="tags=cephtools")
-
-    assert calls == [
-        (
-            "cli",
-            None,
-            ("models", "--format", "json", "--controller", testenv.MAAS_CONTROLLER),
-            False,
-        ),
-        (
-            "cli",
-            f"{testenv.MAAS_CONTROLLER}:cephtools",
-            ("set-model-constraints", "tags=cephtools"),
-            True,
-        ),
-    ]
-
-
-class DummyJuju:
     def __init__(
         self,
         *,
@@ -1878,6 +1652,7 @@ class DummyJuju:
         credentials: dict[str, dict] | None = None,
         controllers: dict[str, dict] | None = None,
         clouds_payload: dict | None = None,
+        add_cloud_error: jubilant.CLIError | None = None,
     ) -> None:
         self.clouds = dict(clouds or {})
         self.credentials = dict(credentials or {})
@@ -1888,7 +1663,7 @@ class DummyJuju:
         self.bootstrap_calls: list[tuple[str, str]] = []
         self.bootstrap_kwargs: list[dict[str, object]] = []
         self.switch_calls: list[str] = []
-        self.add_cloud_error: jubilant.CLIError | None = None
+        self.add_cloud_error = add_cloud_error
         self.add_credential_error: jubilant.CLIError | None = None
 
     def cli(self, command: str, *args: str, include_model: bool = True):
@@ -1944,6 +1719,30 @@ class DummyJuju:
         }
 
 
+def make_dummy_juju(
+    *,
+    has_cloud: bool = False,
+    has_credential: bool = False,
+    has_controller: bool = False,
+    **kwargs: object,
+) -> DummyJuju:
+    """Return a DummyJuju that already knows the requested MAAS pieces."""
+    return DummyJuju(
+        clouds={"maas-cloud": {"type": "maas"}} if has_cloud else None,
+        credentials=(
+            {"maas-cloud": {"admin": {"auth-type": "oauth1"}}}
+            if has_credential
+            else None
+        ),
+        controllers=(
+            {"maas-controller": {"controller-machines": {"Total": 1}}}
+            if has_controller
+            else None
+        ),
+        **kwargs,
+    )
+
+
 @pytest.mark.parametrize(
     ("substrate", "expected_calls"),
     [
@@ -1975,20 +1774,13 @@ def test_install_deps_installs_terraform_for_every_substrate(
     calls: list[str] = []
     runner = CliRunner()
 
-    monkeypatch.setattr(
-        testenv,
-        "install_maas_deb",
-        lambda version: calls.append(f"maas:{version}"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "ensure_snap",
-        lambda name, classic=False: calls.append(f"snap:{name}:{classic}"),
+    _patch_testenv(
+        monkeypatch,
+        install_maas_deb=lambda version: calls.append(f"maas:{version}"),
+        ensure_snap=lambda name, classic=False: calls.append(f"snap:{name}:{classic}"),
+        ensure_terragrunt=lambda: calls.append("terragrunt"),
+        lxd_ready=lambda: calls.append("lxd-ready"),
     )
-    monkeypatch.setattr(
-        testenv, "ensure_terragrunt", lambda: calls.append("terragrunt")
-    )
-    monkeypatch.setattr(testenv, "lxd_ready", lambda: calls.append("lxd-ready"))
 
     result = runner.invoke(testenv.cli, ["--substrate", substrate, "install-deps"])
 
@@ -1996,23 +1788,70 @@ def test_install_deps_installs_terraform_for_every_substrate(
     assert calls == expected_calls
 
 
-def test_juju_onboard_bootstraps_when_missing(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
+@pytest.mark.parametrize(
+    ("juju_kwargs", "bootstrapped", "add_cloud_calls", "add_credential_calls"),
+    [
+        pytest.param({}, True, 1, 1, id="bootstraps-when-missing"),
+        pytest.param(
+            {"has_cloud": True, "has_credential": True, "has_controller": True},
+            False,
+            0,
+            0,
+            id="is-repeatable",
+        ),
+        pytest.param(
+            {
+                "has_credential": True,
+                "has_controller": True,
+                "clouds_payload": {
+                    "localhost": {"type": "lxd"},
+                    "maas-cloud": {"type": "maas"},
+                },
+            },
+            False,
+            0,
+            0,
+            id="detects-existing-cloud-mapping",
+        ),
+        pytest.param(
+            {
+                "has_credential": True,
+                "has_controller": True,
+                "clouds_payload": {"clouds": {}},
+                "add_cloud_error": jubilant.CLIError(
+                    1,
+                    ["juju", "add-cloud"],
+                    stderr='ERROR local cloud "maas-cloud" already exists',
+                ),
+            },
+            False,
+            1,
+            0,
+            id="handles-cloud-exists-error",
+        ),
+    ],
+)
+def test_juju_onboard_maas(
+    monkeypatch: pytest.MonkeyPatch,
+    state_home: Path,
+    juju_kwargs: dict[str, object],
+    bootstrapped: bool,
+    add_cloud_calls: int,
+    add_credential_calls: int,
 ):
     state_home.mkdir(parents=True, exist_ok=True)
     testenv.write_cloud_yaml("10.0.0.1")
     testenv.write_cred_yaml("test-key")
 
-    juju = DummyJuju()
+    juju = make_dummy_juju(**juju_kwargs)
     monkeypatch.setattr(testenv.jubilant, "Juju", lambda *args, **kwargs: juju)
     monkeypatch.setattr(testenv.time, "sleep", lambda *args, **kwargs: None)
 
-    bootstrapped = testenv.juju_onboard()
-
-    assert bootstrapped is True
-    assert juju.add_cloud_calls == 1
-    assert juju.add_credential_calls == 1
-    assert juju.bootstrap_calls == [("maas-cloud", "maas-controller")]
+    assert testenv.juju_onboard() is bootstrapped
+    assert juju.add_cloud_calls == add_cloud_calls
+    assert juju.add_credential_calls == add_credential_calls
+    expected_bootstrap = [("maas-cloud", "maas-controller")] if bootstrapped else []
+    assert juju.bootstrap_calls == expected_bootstrap
     assert juju.switch_calls == ["maas-controller"]
     assert "maas-controller" in juju.controllers
 
@@ -2040,85 +1879,6 @@ def test_juju_onboard_lxd_bootstraps_localhost(
     assert juju.switch_calls == [testenv.LXD_CONTROLLER]
 
 
-def test_juju_onboard_is_repeatable(monkeypatch: pytest.MonkeyPatch, state_home: Path):
-    state_home.mkdir(parents=True, exist_ok=True)
-    testenv.write_cloud_yaml("10.0.0.1")
-    testenv.write_cred_yaml("test-key")
-
-    juju = DummyJuju(
-        clouds={"maas-cloud": {"type": "maas"}},
-        credentials={"maas-cloud": {"admin": {"auth-type": "oauth1"}}},
-        controllers={"maas-controller": {"controller-machines": {"Total": 1}}},
-    )
-    monkeypatch.setattr(testenv.jubilant, "Juju", lambda *args, **kwargs: juju)
-    monkeypatch.setattr(testenv.time, "sleep", lambda *args, **kwargs: None)
-
-    bootstrapped = testenv.juju_onboard()
-
-    assert bootstrapped is False
-    assert juju.add_cloud_calls == 0
-    assert juju.add_credential_calls == 0
-    assert juju.bootstrap_calls == []
-    assert juju.switch_calls == ["maas-controller"]
-
-
-def test_juju_onboard_detects_existing_cloud_mapping(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
-):
-    state_home.mkdir(parents=True, exist_ok=True)
-    testenv.write_cloud_yaml("10.0.0.1")
-    testenv.write_cred_yaml("test-key")
-
-    juju = DummyJuju(
-        clouds={},
-        credentials={"maas-cloud": {"admin": {"auth-type": "oauth1"}}},
-        controllers={"maas-controller": {"controller-machines": {"Total": 1}}},
-        clouds_payload={
-            "localhost": {"type": "lxd"},
-            "maas-cloud": {"type": "maas"},
-        },
-    )
-    monkeypatch.setattr(testenv.jubilant, "Juju", lambda *args, **kwargs: juju)
-    monkeypatch.setattr(testenv.time, "sleep", lambda *args, **kwargs: None)
-
-    bootstrapped = testenv.juju_onboard()
-
-    assert bootstrapped is False
-    assert juju.add_cloud_calls == 0
-    assert juju.add_credential_calls == 0
-    assert juju.bootstrap_calls == []
-    assert juju.switch_calls == ["maas-controller"]
-
-
-def test_juju_onboard_handles_cloud_exists_error(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
-):
-    state_home.mkdir(parents=True, exist_ok=True)
-    testenv.write_cloud_yaml("10.0.0.1")
-    testenv.write_cred_yaml("test-key")
-
-    juju = DummyJuju(
-        credentials={"maas-cloud": {"admin": {"auth-type": "oauth1"}}},
-        controllers={"maas-controller": {"controller-machines": {"Total": 1}}},
-        clouds_payload={"clouds": {}},
-    )
-    juju.add_cloud_error = jubilant.CLIError(
-        1,
-        ["juju", "add-cloud"],
-        stderr='ERROR local cloud "maas-cloud" already exists',
-    )
-    monkeypatch.setattr(testenv.jubilant, "Juju", lambda *args, **kwargs: juju)
-    monkeypatch.setattr(testenv.time, "sleep", lambda *args, **kwargs: None)
-
-    bootstrapped = testenv.juju_onboard()
-
-    assert bootstrapped is False
-    assert juju.add_cloud_calls == 1
-    assert juju.add_credential_calls == 0
-    assert juju.bootstrap_calls == []
-    assert juju.switch_calls == ["maas-controller"]
-
-
 def test_cleanup_destroy_nodes_skips_missing_inputs(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
@@ -2167,10 +1927,7 @@ def test_cleanup_kill_controller_when_present(
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -2218,10 +1975,7 @@ def test_cleanup_delete_vm_host_when_present(
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            stdout = ""
-
-        return Result()
+        return _RunResult()
 
     monkeypatch.setattr(testenv, "run", fake_run)
 
@@ -2280,14 +2034,8 @@ def test_cleanup_delete_known_lxd_instances_skips_missing(
     def fake_run(cmd, check=True, shell=False, quiet=False):
         commands.append(cmd)
 
-        class Result:
-            def __init__(self, stdout: str = "", stderr: str = "", returncode: int = 0):
-                self.stdout = stdout
-                self.stderr = stderr
-                self.returncode = returncode
-
         if cmd == ["lxc", "info", testenv.WARMUP_VM_NAME]:
-            return Result(returncode=1, stderr="Error: Instance not found")
+            return _RunResult(returncode=1, stderr="Error: Instance not found")
         raise AssertionError(cmd)
 
     monkeypatch.setattr(testenv, "run", fake_run)
@@ -2304,14 +2052,8 @@ def test_cleanup_delete_known_lxd_instances_reports_inspection_failure(
     monkeypatch.setattr(testenv.shutil, "which", lambda name: "/bin/true")
 
     def fake_run(cmd, check=True, shell=False, quiet=False):
-        class Result:
-            def __init__(self, stdout: str = "", stderr: str = "", returncode: int = 0):
-                self.stdout = stdout
-                self.stderr = stderr
-                self.returncode = returncode
-
         if cmd == ["lxc", "info", testenv.WARMUP_VM_NAME]:
-            return Result(returncode=1, stderr="Error: Failed to connect to LXD")
+            return _RunResult(returncode=1, stderr="Error: Failed to connect to LXD")
         raise AssertionError(cmd)
 
     monkeypatch.setattr(testenv, "run", fake_run)
@@ -2390,6 +2132,26 @@ def test_cleanup_remove_terragrunt_inputs_skips_missing_terragrunt_dir(
     assert "no Terragrunt inputs to remove" in result.detail
 
 
+def test_cli_reuses_ip_from_context_obj(monkeypatch: pytest.MonkeyPatch) -> None:
+    runner = CliRunner()
+    monkeypatch.setattr(
+        testenv,
+        "primary_ip",
+        lambda: pytest.fail("primary_ip should not be probed when ip is known"),
+    )
+    monkeypatch.setattr(
+        testenv,
+        "run",
+        lambda *args, **kwargs: pytest.fail("run should not be called in dry-run"),
+    )
+
+    result = runner.invoke(
+        testenv.cli, ["cleanup", "--dry-run"], obj={"ip": "10.0.0.9"}
+    )
+
+    assert result.exit_code == 0, result.output
+
+
 def test_cleanup_cli_dry_run_does_not_invoke_run(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -2412,36 +2174,17 @@ def test_cleanup_cli_keep_flags_skip_helpers(monkeypatch: pytest.MonkeyPatch) ->
     runner = CliRunner()
     calls: list[str] = []
 
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_destroy_nodes",
-        lambda *args, **kwargs: calls.append("nodes"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda *args, **kwargs: calls.append("controller"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_vm_host",
-        lambda *args, **kwargs: calls.append("vm-host"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda *args, **kwargs: calls.append("lxd"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda *args, **kwargs: calls.append("state-files"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_terragrunt_inputs",
-        lambda *args, **kwargs: calls.append("terragrunt-inputs"),
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_destroy_nodes=lambda *args, **kwargs: calls.append("nodes"),
+        _cleanup_kill_controller=lambda *args, **kwargs: calls.append("controller"),
+        _cleanup_delete_vm_host=lambda *args, **kwargs: calls.append("vm-host"),
+        _cleanup_delete_known_lxd_instances=lambda *args, **kwargs: calls.append("lxd"),
+        _cleanup_remove_state_files=lambda *args, **kwargs: calls.append("state-files"),
+        _cleanup_remove_terragrunt_inputs=lambda *args, **kwargs: calls.append(
+            "terragrunt-inputs"
+        ),
     )
 
     result = runner.invoke(
@@ -2467,38 +2210,21 @@ def test_cleanup_cli_keep_nodes_preserves_terragrunt_inputs(
     runner = CliRunner()
     calls: list[str] = []
 
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda *_args, **_kwargs: pytest.fail(
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_kill_controller=lambda *_args, **_kwargs: pytest.fail(
             "controller cleanup should be implied off by --keep-nodes"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_vm_host",
-        lambda admin, vmhost: testenv.CleanupPhaseResult(
+        _cleanup_delete_vm_host=lambda admin, vmhost: testenv.CleanupPhaseResult(
             f"delete vm host {vmhost}", "skipped", "absent"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: testenv.CleanupPhaseResult(
+        _cleanup_delete_known_lxd_instances=lambda: testenv.CleanupPhaseResult(
             "delete known LXD instances", "skipped", "absent"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: calls.append("state-files")
+        _cleanup_remove_state_files=lambda: calls.append("state-files")
         or testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_terragrunt_inputs",
-        lambda: calls.append("terragrunt-inputs")
+        _cleanup_remove_terragrunt_inputs=lambda: calls.append("terragrunt-inputs")
         or testenv.CleanupPhaseResult("remove terragrunt inputs", "ok", "removed"),
     )
 
@@ -2521,33 +2247,20 @@ def test_cleanup_cli_keep_nodes_implies_keep_controller_for_lxd(
 ) -> None:
     runner = CliRunner()
     calls: list[str] = []
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda *_args, **_kwargs: pytest.fail(
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_kill_controller=lambda *_args, **_kwargs: pytest.fail(
             "controller cleanup should be implied off by --keep-nodes"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_lxd_osd_volumes",
-        lambda *_args, **_kwargs: pytest.fail(
+        _cleanup_lxd_osd_volumes=lambda *_args, **_kwargs: pytest.fail(
             "OSD volume cleanup should be skipped by --keep-nodes"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: calls.append("lxd-instances")
+        _cleanup_delete_known_lxd_instances=lambda: calls.append("lxd-instances")
         or testenv.CleanupPhaseResult(
             "delete known LXD instances", "skipped", "absent"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: calls.append("state-files")
+        _cleanup_remove_state_files=lambda: calls.append("state-files")
         or testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
     )
 
@@ -2568,32 +2281,21 @@ def test_cleanup_cli_explicit_keep_controller_remains_distinct_for_lxd(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     runner = CliRunner()
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda *_args, **_kwargs: pytest.fail(
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_kill_controller=lambda *_args, **_kwargs: pytest.fail(
             "controller cleanup should be skipped by --keep-controller"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_lxd_osd_volumes",
-        lambda *_args, **_kwargs: pytest.fail(
+        _cleanup_lxd_osd_volumes=lambda *_args, **_kwargs: pytest.fail(
             "OSD volume cleanup should be skipped while controller is kept"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: testenv.CleanupPhaseResult(
+        _cleanup_delete_known_lxd_instances=lambda: testenv.CleanupPhaseResult(
             "delete known LXD instances", "skipped", "absent"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
+        _cleanup_remove_state_files=lambda: testenv.CleanupPhaseResult(
+            "remove state files", "ok", "removed"
+        ),
     )
 
     result = runner.invoke(testenv.cli, ["cleanup", "--keep-controller"])
@@ -2615,43 +2317,22 @@ def test_cleanup_cli_best_effort_reports_failures(
     runner = CliRunner()
     calls: list[str] = []
 
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_destroy_nodes",
-        lambda: calls.append("nodes")
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_destroy_nodes=lambda: calls.append("nodes")
         or testenv.CleanupPhaseResult("destroy nodes", "failed", "boom"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda controller_name: calls.append("controller")
+        _cleanup_kill_controller=lambda controller_name: calls.append("controller")
         or testenv.CleanupPhaseResult(
             f"kill controller {controller_name}", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_vm_host",
-        lambda admin, vmhost: calls.append("vm-host")
+        _cleanup_delete_vm_host=lambda admin, vmhost: calls.append("vm-host")
         or testenv.CleanupPhaseResult(f"delete vm host {vmhost}", "skipped", "absent"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: calls.append("lxd")
+        _cleanup_delete_known_lxd_instances=lambda: calls.append("lxd")
         or testenv.CleanupPhaseResult("delete known LXD instances", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: calls.append("state-files")
+        _cleanup_remove_state_files=lambda: calls.append("state-files")
         or testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_terragrunt_inputs",
-        lambda: calls.append("terragrunt-inputs")
+        _cleanup_remove_terragrunt_inputs=lambda: calls.append("terragrunt-inputs")
         or testenv.CleanupPhaseResult("remove terragrunt inputs", "ok", "removed"),
     )
 
@@ -2695,91 +2376,40 @@ def test_cleanup_cli_purge_installed_runs_extended_phases(
     runner = CliRunner()
     calls: list[str] = []
 
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_destroy_nodes",
-        lambda: calls.append("nodes")
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_destroy_nodes=lambda: calls.append("nodes")
         or testenv.CleanupPhaseResult("destroy nodes", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda controller_name: calls.append("controller")
+        _cleanup_kill_controller=lambda controller_name: calls.append("controller")
         or testenv.CleanupPhaseResult(
             f"kill controller {controller_name}", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_vm_host",
-        lambda admin, vmhost: calls.append("vm-host")
+        _cleanup_delete_vm_host=lambda admin, vmhost: calls.append("vm-host")
         or testenv.CleanupPhaseResult(f"delete vm host {vmhost}", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: calls.append("delete-lxd-instances")
+        _cleanup_delete_known_lxd_instances=lambda: calls.append("delete-lxd-instances")
         or testenv.CleanupPhaseResult("delete known LXD instances", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: calls.append("state-files")
+        _cleanup_remove_state_files=lambda: calls.append("state-files")
         or testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_terragrunt_inputs",
-        lambda: calls.append("terragrunt-inputs")
+        _cleanup_remove_terragrunt_inputs=lambda: calls.append("terragrunt-inputs")
         or testenv.CleanupPhaseResult("remove terragrunt inputs", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_snap",
-        lambda name: calls.append(f"snap:{name}")
+        _cleanup_remove_snap=lambda name: calls.append(f"snap:{name}")
         or testenv.CleanupPhaseResult(f"remove snap {name}", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_user_paths",
-        lambda phase, paths: calls.append("juju-state")
+        _cleanup_remove_user_paths=lambda phase, paths: calls.append("juju-state")
         or testenv.CleanupPhaseResult(phase, "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_purge_apt_packages",
-        lambda phase, prefixes=(), exact_names=(): calls.append(phase)
+        _cleanup_purge_apt_packages=lambda phase,
+        prefixes=(),
+        exact_names=(): calls.append(phase)
         or testenv.CleanupPhaseResult(phase, "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_apt_autoremove",
-        lambda: calls.append("apt-autoremove")
+        _cleanup_apt_autoremove=lambda: calls.append("apt-autoremove")
         or testenv.CleanupPhaseResult("apt autoremove --purge", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_maas_ppa_sources",
-        lambda: calls.append("maas-ppa")
+        _cleanup_remove_maas_ppa_sources=lambda: calls.append("maas-ppa")
         or testenv.CleanupPhaseResult("remove MAAS apt sources", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_apt_update",
-        lambda: calls.append("apt-update")
+        _cleanup_apt_update=lambda: calls.append("apt-update")
         or testenv.CleanupPhaseResult("apt update", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_restore_systemd_timesyncd",
-        lambda: calls.append("timesyncd")
+        _cleanup_restore_systemd_timesyncd=lambda: calls.append("timesyncd")
         or testenv.CleanupPhaseResult("restore systemd-timesyncd", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_root_paths",
-        lambda phase, paths: calls.append(phase)
+        _cleanup_remove_root_paths=lambda phase, paths: calls.append(phase)
         or testenv.CleanupPhaseResult(phase, "ok", "removed"),
     )
 
@@ -2856,88 +2486,49 @@ def test_cleanup_cli_purge_installed_removes_terragrunt_inputs_after_node_failur
     runner = CliRunner()
     calls: list[str] = []
 
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_destroy_nodes",
-        lambda: calls.append("nodes")
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        _cleanup_destroy_nodes=lambda: calls.append("nodes")
         or testenv.CleanupPhaseResult("destroy nodes", "failed", "boom"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_kill_controller",
-        lambda controller_name: testenv.CleanupPhaseResult(
+        _cleanup_kill_controller=lambda controller_name: testenv.CleanupPhaseResult(
             f"kill controller {controller_name}", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_vm_host",
-        lambda admin, vmhost: testenv.CleanupPhaseResult(
+        _cleanup_delete_vm_host=lambda admin, vmhost: testenv.CleanupPhaseResult(
             f"delete vm host {vmhost}", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_delete_known_lxd_instances",
-        lambda: testenv.CleanupPhaseResult(
+        _cleanup_delete_known_lxd_instances=lambda: testenv.CleanupPhaseResult(
             "delete known LXD instances", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_state_files",
-        lambda: testenv.CleanupPhaseResult("remove state files", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_terragrunt_inputs",
-        lambda: calls.append("terragrunt-inputs")
+        _cleanup_remove_state_files=lambda: testenv.CleanupPhaseResult(
+            "remove state files", "ok", "removed"
+        ),
+        _cleanup_remove_terragrunt_inputs=lambda: calls.append("terragrunt-inputs")
         or testenv.CleanupPhaseResult("remove terragrunt inputs", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_snap",
-        lambda name: testenv.CleanupPhaseResult(f"remove snap {name}", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_user_paths",
-        lambda phase, paths: testenv.CleanupPhaseResult(phase, "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_purge_apt_packages",
-        lambda phase, prefixes=(), exact_names=(): testenv.CleanupPhaseResult(
+        _cleanup_remove_snap=lambda name: testenv.CleanupPhaseResult(
+            f"remove snap {name}", "ok", "removed"
+        ),
+        _cleanup_remove_user_paths=lambda phase, paths: testenv.CleanupPhaseResult(
             phase, "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_apt_autoremove",
-        lambda: testenv.CleanupPhaseResult("apt autoremove --purge", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_maas_ppa_sources",
-        lambda: testenv.CleanupPhaseResult("remove MAAS apt sources", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_apt_update",
-        lambda: testenv.CleanupPhaseResult("apt update", "ok", "removed"),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_restore_systemd_timesyncd",
-        lambda: testenv.CleanupPhaseResult(
+        _cleanup_purge_apt_packages=lambda phase,
+        prefixes=(),
+        exact_names=(): testenv.CleanupPhaseResult(phase, "ok", "removed"),
+        _cleanup_apt_autoremove=lambda: testenv.CleanupPhaseResult(
+            "apt autoremove --purge", "ok", "removed"
+        ),
+        _cleanup_remove_maas_ppa_sources=lambda: testenv.CleanupPhaseResult(
+            "remove MAAS apt sources", "ok", "removed"
+        ),
+        _cleanup_apt_update=lambda: testenv.CleanupPhaseResult(
+            "apt update", "ok", "removed"
+        ),
+        _cleanup_restore_systemd_timesyncd=lambda: testenv.CleanupPhaseResult(
             "restore systemd-timesyncd", "ok", "removed"
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_cleanup_remove_root_paths",
-        lambda phase, paths: testenv.CleanupPhaseResult(phase, "ok", "removed"),
+        _cleanup_remove_root_paths=lambda phase, paths: testenv.CleanupPhaseResult(
+            phase, "ok", "removed"
+        ),
     )
 
     result = runner.invoke(
@@ -2953,16 +2544,11 @@ def test_lxd_init_cli_uses_fixed_disposable_lab_conventions(
 ) -> None:
     runner = CliRunner()
     calls: list[tuple[object, ...]] = []
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.1")
-    monkeypatch.setattr(
-        testenv,
-        "lxd_init_lxd_impl",
-        lambda bridge: calls.append(("init", bridge)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "verify_lxd",
-        lambda bridge: calls.append(("verify", bridge)),
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.1",
+        lxd_init_lxd_impl=lambda bridge: calls.append(("init", bridge)),
+        verify_lxd=lambda bridge: calls.append(("verify", bridge)),
     )
 
     result = runner.invoke(testenv.cli, ["lxd-init"])
@@ -2979,25 +2565,19 @@ def test_register_vm_host_cli_wires_maas_host_conventions(
 ) -> None:
     runner = CliRunner()
     calls: list[tuple[object, ...]] = []
-    monkeypatch.setattr(testenv, "primary_ip", lambda: "10.0.0.10")
-    monkeypatch.setattr(
-        testenv,
-        "register_lxd_vmhost_impl",
-        lambda admin, vmhost, ip, **kwargs: calls.append(
+    _patch_testenv(
+        monkeypatch,
+        primary_ip=lambda: "10.0.0.10",
+        register_lxd_vmhost_impl=lambda admin, vmhost, ip, **kwargs: calls.append(
             ("register", admin, vmhost, ip, kwargs)
         ),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "import_boot_resources",
-        lambda admin, **kwargs: calls.append(("import", admin, kwargs)),
-    )
-    monkeypatch.setattr(
-        testenv,
-        "_wait_for_vm_host_architecture",
-        lambda admin, vmhost, arch, **kwargs: calls.append(
-            ("wait", admin, vmhost, arch, kwargs)
+        import_boot_resources=lambda admin, **kwargs: calls.append(
+            ("import", admin, kwargs)
         ),
+        _wait_for_vm_host_architecture=lambda admin,
+        vmhost,
+        arch,
+        **kwargs: calls.append(("wait", admin, vmhost, arch, kwargs)),
     )
 
     result = runner.invoke(
@@ -3034,17 +2614,14 @@ def test_register_vm_host_cli_wires_maas_vm_conventions(
         bridges.append(bridge)
         return "10.20.0.0/24", "10.20.0.1"
 
-    monkeypatch.setattr(testenv, "lxd_network_cidr_and_gateway", fake_network)
-    monkeypatch.setattr(
-        testenv,
-        "register_lxd_vmhost_impl",
-        lambda admin, vmhost, ip, **kwargs: calls.append(
+    _patch_testenv(
+        monkeypatch,
+        lxd_network_cidr_and_gateway=fake_network,
+        register_lxd_vmhost_impl=lambda admin, vmhost, ip, **kwargs: calls.append(
             ("register", admin, vmhost, ip, kwargs)
         ),
-    )
-    monkeypatch.setattr(testenv, "import_boot_resources", lambda *args, **kwargs: None)
-    monkeypatch.setattr(
-        testenv, "_wait_for_vm_host_architecture", lambda *args, **kwargs: None
+        import_boot_resources=lambda *args, **kwargs: None,
+        _wait_for_vm_host_architecture=lambda *args, **kwargs: None,
     )
 
     result = runner.invoke(testenv.cli, ["--substrate", "maas-vm", "register-vm-host"])
@@ -3087,13 +2664,6 @@ def test_register_vm_host_cli_is_noop_for_lxd(
 # ---------------------------------------------------------------------------
 
 
-class _RunResult:
-    def __init__(self, stdout: str = "", returncode: int = 0):
-        self.stdout = stdout
-        self.stderr = ""
-        self.returncode = returncode
-
-
 def _warmup_run_recorder(calls, *, status_payloads):
     """Fake testenv.run that drives juju_warmup through to completion.
 
@@ -3197,12 +2767,15 @@ def test_install_runs_juju_warmup_for_lxd_substrate(monkeypatch):
     runner = CliRunner()
 
     # Short-circuit every install step so we can assert the step list runs.
-    monkeypatch.setattr(testenv, "install_fault_handlers", lambda name: None)
-    monkeypatch.setattr(testenv, "install_deps", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "lxd_init_cmd", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "juju_init", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "configure_network", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "_ensure_model_for_substrate", lambda *a, **k: None)
+    _patch_testenv(
+        monkeypatch,
+        install_fault_handlers=lambda name: None,
+        install_deps=lambda *a, **k: None,
+        lxd_init_cmd=lambda *a, **k: None,
+        juju_init=lambda *a, **k: None,
+        configure_network=lambda *a, **k: None,
+        _ensure_model_for_substrate=lambda *a, **k: None,
+    )
     warmed: list[bool] = []
     monkeypatch.setattr(testenv, "juju_warmup", lambda *a, **k: warmed.append(True))
     monkeypatch.setattr(testenv, "mark_complete", lambda: None)
@@ -3218,22 +2791,21 @@ def test_install_skips_juju_warmup_for_maas_host_substrate(monkeypatch):
     """MAAS-host install must not run the LXD-only juju warmup."""
     runner = CliRunner()
 
-    monkeypatch.setattr(testenv, "install_fault_handlers", lambda name: None)
-    monkeypatch.setattr(testenv, "install_deps", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "lxd_init_cmd", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "maas_init_cmd", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "register_vm_host", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "configure_network", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "juju_init", lambda *a, **k: None)
-    monkeypatch.setattr(testenv, "_ensure_model_for_substrate", lambda *a, **k: None)
-    monkeypatch.setattr(
-        testenv,
-        "juju_warmup",
-        lambda *a, **k: pytest.fail("warmup must not run for MAAS"),
+    _patch_testenv(
+        monkeypatch,
+        install_fault_handlers=lambda name: None,
+        install_deps=lambda *a, **k: None,
+        lxd_init_cmd=lambda *a, **k: None,
+        maas_init_cmd=lambda *a, **k: None,
+        register_vm_host=lambda *a, **k: None,
+        configure_network=lambda *a, **k: None,
+        juju_init=lambda *a, **k: None,
+        _ensure_model_for_substrate=lambda *a, **k: None,
+        juju_warmup=lambda *a, **k: pytest.fail("warmup must not run for MAAS"),
+        mark_complete=lambda: None,
+        # MAAS juju_onboard path touches state files; stub jubilant to avoid that.
+        juju_onboard=lambda *a, **k: True,
     )
-    monkeypatch.setattr(testenv, "mark_complete", lambda: None)
-    # MAAS juju_onboard path touches state files; stub jubilant to avoid that.
-    monkeypatch.setattr(testenv, "juju_onboard", lambda *a, **k: True)
 
     result = runner.invoke(testenv.cli, ["--substrate", "maas-host", "install"])
 
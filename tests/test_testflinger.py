@@ -3,7 +3,9 @@ from __future__ import annotations
 import datetime as dt
 import json
 from pathlib import Path
-from typing import Any
+from types import SimpleNamespace
+from typing import Any, Iterator
+from unittest.mock import MagicMock, patch
 
 import pytest
 from click import ClickException
@@ -33,6 +35,69 @@ from cephtools.testflinger import (
 )
 
 
+CLOUD_YAML = b"""\
+clouds:
+  maas-cloud:
+    type: maas
+    auth-types: [oauth1]
+    endpoint: http://10.0.0.1:5240/MAAS
+"""
+CRED_YAML = b"""\
+credentials:
+  maas-cloud:
+    admin:
+      auth-type: oauth1
+      maas-oauth: AAA:BBB:CCC
+"""
+NETWORK_YAML = b"""\
+network:
+  bridge: lxdbr0
+"""
+NETWORK_YAML_FULL = b"""\
+network:
+  bridge: lxdbr0
+  cidr: 10.0.0.0/24
+  gateway: 10.0.0.1
+  dynamic_range:
+    start: 10.0.0.100
+    end: 10.0.0.199
+  subnet_id: 1
+  fabric_id: 2
+  vlan_id: 3
+  rack_sysid: racksys-1
+  space_id: 4
+  external:
+    bridge: ext
+    cidr: 10.10.0.0/24
+    gateway: 10.10.0.1
+    dynamic_range:
+      start: 10.10.0.100
+      end: 10.10.0.199
+    subnet_id: 10
+    fabric_id: 11
+    vlan_id: 12
+    rack_sysid: racksys-2
+    space_id: 13
+"""
+
+
+def _result(stdout: str = "", returncode: int = 0, stderr: str = "") -> SimpleNamespace:
+    return SimpleNamespace(returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+class _SpyRunner:
+    """Runner stand-in that records each call and returns a fixed result."""
+
+    def __init__(self, returncode: int = 0, stdout: str = "") -> None:
+        self.returncode = returncode
+        self.stdout = stdout
+        self.calls: list[tuple[list[str], dict[str, Any]]] = []
+
+    def __call__(self, cmd: list[str], **kwargs: Any) -> SimpleNamespace:
+        self.calls.append((cmd, kwargs))
+        return _result(self.stdout, returncode=self.returncode)
+
+
 @pytest.fixture
 def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
     home = tmp_path / "state"
@@ -40,29 +105,34 @@ def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
     return home
 
 
-def test_build_job_file_includes_required_fields() -> None:
-    config = BackendConfig(
-        launchpad_account="lp:tester",
-        job_tag="foo",
-        mattermost_name="@test",
-    )
-    job_file = build_job_file(config, "ceph-qa-1", reserve_for=900)
+_FULL_CONFIG = BackendConfig(
+    launchpad_account="lp:tester",
+    job_tag="foo",
+    mattermost_name="@test",
+)
+_GH_CONFIG = BackendConfig(launchpad_account="gh:test")
+_TESTER_CONFIG = BackendConfig(launchpad_account="lp:tester")
 
-    assert "job_queue: ceph-qa-1" in job_file
-    assert "    - lp:tester" in job_file
-    assert "  - foo" in job_file
-    assert "# Ask @test on Mattermost" in job_file
+
+@pytest.fixture(scope="module")
+def full_job_file() -> str:
+    return build_job_file(_FULL_CONFIG, "ceph-qa-1", reserve_for=900)
+
+
+def test_build_job_file_includes_required_fields(full_job_file: str) -> None:
+    required = {
+        "job_queue: ceph-qa-1",
+        "    - lp:tester",
+        "  - foo",
+        "# Ask @test on Mattermost if you have questions",
+    }
+    assert required <= set(full_job_file.splitlines())
 
 
 def test_build_job_file_preserves_custom_ssh_key_ref() -> None:
-    config = BackendConfig(
-        launchpad_account="gh:test",
-        job_tag=None,
-        mattermost_name=None,
-    )
-    job_file = build_job_file(config, "ceph-qa-1", reserve_for=600)
+    job_file = build_job_file(_GH_CONFIG, "ceph-qa-1", reserve_for=600)
 
-    assert "    - gh:test" in job_file
+    assert "    - gh:test" in job_file.splitlines()
 
 
 def test_ssh_key_reference_warning_for_valid_ref() -> None:
@@ -88,41 +158,35 @@ def test_ssh_key_reference_warning_for_invalid_ref(value: str) -> None:
             "Job submitted successfully!\nJob abcdef\n",
             "abcdef",
         ),
+        (
+            "\nJob submitted successfully!\n\n  Job ID: 5678-ef  \ntrailing noise\n",
+            "5678-ef",
+        ),
     ],
 )
 def test_parse_submit_output_success(stdout: str, expected: str) -> None:
     assert parse_submit_output(stdout) == expected
 
 
-@pytest.mark.parametrize(
-    "stdout",
-    [
-        "Something went wrong",
-        "Job submitted successfully!\nInvalid\n",
-    ],
+_SUBMIT_FAILURES = (
+    "Something went wrong",
+    "Job submitted successfully!\nInvalid\n",
 )
-def test_parse_submit_output_failure(stdout: str) -> None:
-    with pytest.raises(ClickException):
-        parse_submit_output(stdout)
-
 
-def test_cancel_reservation_invokes_testflinger() -> None:
-    calls: list[tuple[list[str], dict[str, Any]]] = []
 
-    def fake_runner(cmd: list[str], **kwargs: Any):
-        calls.append((cmd, kwargs))
+def test_parse_submit_output_failure() -> None:
+    for stdout in _SUBMIT_FAILURES:
+        with pytest.raises(ClickException):
+            parse_submit_output(stdout)
 
-        class Result:
-            returncode = 0
-            stdout = "Cancelled job-1\n"
-            stderr = ""
 
-        return Result()
+def test_cancel_reservation_invokes_testflinger() -> None:
+    runner = _SpyRunner(stdout="Cancelled job-1\n")
 
-    result = cancel_reservation("job-1", runner=fake_runner, testflinger_bin="tf")
+    result = cancel_reservation("job-1", runner=runner, testflinger_bin="tf")
 
     assert result.stdout == "Cancelled job-1\n"
-    assert calls == [
+    assert runner.calls == [
         (
             ["tf", "cancel", "job-1"],
             {"capture_output": True, "text": True, "check": False},
@@ -144,11 +208,7 @@ def test_cancel_reservation_failure(
     expected_message: str,
 ) -> None:
     def failing_runner(cmd: list[str], **kwargs: Any):
-        return type(
-            "Result",
-            (),
-            {"returncode": 1, "stdout": stdout, "stderr": stderr},
-        )()
+        return _result(stdout, returncode=1, stderr=stderr)
 
     with pytest.raises(ClickException, match=expected_message):
         cancel_reservation("job-1", runner=failing_runner, testflinger_bin="tf")
@@ -174,11 +234,7 @@ def test_cancel_cli_invokes_helper(
         captured["runner"] = runner
         captured["testflinger_bin"] = testflinger_bin
 
-        class Result:
-            stdout = "Cancelled job-9\n"
-            stderr = ""
-
-        return Result()
+        return _result("Cancelled job-9\n")
 
     monkeypatch.setattr(
         "cephtools.testflinger.cancel_reservation", fake_cancel_reservation
@@ -247,11 +303,7 @@ def test_cancel_cli_latest_uses_saved_job(
         captured["job_id"] = job_id
         captured["testflinger_bin"] = testflinger_bin
 
-        class Result:
-            stdout = "Cancelled job-latest\n"
-            stderr = ""
-
-        return Result()
+        return _result("Cancelled job-latest\n")
 
     monkeypatch.setattr(
         "cephtools.testflinger.cancel_reservation", fake_cancel_reservation
@@ -308,7 +360,7 @@ def test_reserve_cli_saves_latest_reservation(
 
     monkeypatch.setattr(
         "cephtools.testflinger.ensure_backend_config",
-        lambda *args, **kwargs: (BackendConfig("lp:tester"), False),
+        lambda *args, **kwargs: (_TESTER_CONFIG, False),
     )
     monkeypatch.setattr(
         "cephtools.testflinger._ssh_key_reference_warning", lambda value: None
@@ -340,13 +392,14 @@ def test_parse_reservation_window_success() -> None:
     ]
 
     details = _parse_reservation_window(window, "ceph-qa-1")
-    assert details is not None
-    assert details.job_id == "job-1"
-    assert details.queue_name == "ceph-qa-1"
-    assert details.user == "ubuntu"
-    assert details.ip == "10.0.0.1"
-    assert details.timeout_seconds == 3600
-    assert details.expires_at == dt.datetime.fromisoformat(expiry)
+    assert details == ReservationDetails(
+        job_id="job-1",
+        queue_name="ceph-qa-1",
+        user="ubuntu",
+        ip="10.0.0.1",
+        expires_at=dt.datetime.fromisoformat(expiry),
+        timeout_seconds=3600,
+    )
 
 
 def test_ensure_backend_config_creates_and_loads(tmp_path: Path) -> None:
@@ -373,12 +426,15 @@ def test_ensure_backend_config_creates_and_loads(tmp_path: Path) -> None:
 
 def test_build_deploy_script() -> None:
     script = build_deploy_script()
+    required = {
+        "sudo chmod 0755 /usr/local/bin/cephtools",
+        'test "$(cephtools testenv job protocol)" = "1"',
+        "mkdir -p ~/src",
+        "cd ~/src",
+        "git clone https://github.com/canonical/cephtools.git",
+    }
+    assert required <= set(script.splitlines())
     assert "releases/download/latest/cephtools" in script
-    assert "sudo chmod 0755 /usr/local/bin/cephtools" in script
-    assert 'test "$(cephtools testenv job protocol)" = "1"' in script
-    assert "mkdir -p ~/src" in script
-    assert "cd ~/src" in script
-    assert "git clone https://github.com/canonical/cephtools.git" in script
     assert "uv pip install" not in script
     assert script.strip().endswith("cephtools testenv install")
 
@@ -393,69 +449,43 @@ def test_build_deploy_script_quotes_testenv_args() -> None:
     assert "cephtools testenv --maas-vm-memory '16 GiB' install" in script
 
 
-def test_perform_remote_deploy_invokes_ssh() -> None:
-    calls: list[tuple[list[str], dict[str, Any]]] = []
+_DETAILS = ReservationDetails(
+    job_id="job-1",
+    queue_name="ceph-qa-1",
+    user="ubuntu",
+    ip="10.0.0.2",
+    expires_at=dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc),
+    timeout_seconds=600,
+)
 
-    def fake_runner(cmd: list[str], **kwargs: Any):
-        calls.append((cmd, kwargs))
+_EXPECTED_SSH_CMD = [
+    "ssh",
+    "-o",
+    "StrictHostKeyChecking=no",
+    "-o",
+    "UserKnownHostsFile=/dev/null",
+    "ubuntu@10.0.0.2",
+    "bash",
+    "-se",
+]
 
-        class Result:
-            returncode = 0
-            stdout = ""
-            stderr = ""
 
-        return Result()
+def test_perform_remote_deploy_invokes_ssh() -> None:
+    runner = _SpyRunner()
 
-    details = ReservationDetails(
-        job_id="job-1",
-        queue_name="ceph-qa-1",
-        user="ubuntu",
-        ip="10.0.0.2",
-        expires_at=dt.datetime.now(),
-        timeout_seconds=600,
-    )
+    perform_remote_deploy(_DETAILS, "echo hi", runner=runner)
 
-    perform_remote_deploy(details, "echo hi", runner=fake_runner)
-
-    assert calls
-    cmd, kwargs = calls[0]
-    assert cmd == [
-        "ssh",
-        "-o",
-        "StrictHostKeyChecking=no",
-        "-o",
-        "UserKnownHostsFile=/dev/null",
-        "ubuntu@10.0.0.2",
-        "bash",
-        "-se",
-    ]
+    assert runner.calls
+    cmd, kwargs = runner.calls[0]
+    assert cmd == _EXPECTED_SSH_CMD
     assert kwargs["input"] == "echo hi"
     assert kwargs["text"] is True
     assert kwargs["check"] is False
 
 
 def test_perform_remote_deploy_failure() -> None:
-    def failing_runner(cmd: list[str], **kwargs: Any):
-        class Result:
-            returncode = 42
-            stdout = ""
-            stderr = ""
-
-        return Result()
-
     with pytest.raises(ClickException):
-        perform_remote_deploy(
-            ReservationDetails(
-                job_id="job-1",
-                queue_name="ceph-qa-1",
-                user="ubuntu",
-                ip="10.0.0.2",
-                expires_at=dt.datetime.now(),
-                timeout_seconds=600,
-            ),
-            "echo hi",
-            runner=failing_runner,
-        )
+        perform_remote_deploy(_DETAILS, "echo hi", runner=_SpyRunner(returncode=42))
 
 
 def _mk_details(job_id: str, ip: str = "10.0.0.2") -> ReservationDetails:
@@ -532,7 +562,7 @@ def test_deploy_with_retries_success_first_attempt(
     details = testflinger.deploy_with_retries(
         queue_name="ceph-qa-1",
         reserve_for=600,
-        config=BackendConfig("lp:tester"),
+        config=_TESTER_CONFIG,
         testenv_args="",
         testflinger_bin="tf",
         max_attempts=2,
@@ -562,7 +592,7 @@ def test_deploy_with_retries_succeeds_on_second_attempt(
     details = testflinger.deploy_with_retries(
         queue_name="ceph-qa-1",
         reserve_for=600,
-        config=BackendConfig("lp:tester"),
+        config=_TESTER_CONFIG,
         testenv_args="",
         testflinger_bin="tf",
         max_attempts=2,
@@ -592,7 +622,7 @@ def test_deploy_with_retries_all_attempts_fail(
         testflinger.deploy_with_retries(
             queue_name="ceph-qa-1",
             reserve_for=600,
-            config=BackendConfig("lp:tester"),
+            config=_TESTER_CONFIG,
             testenv_args="",
             testflinger_bin="tf",
             max_attempts=2,
@@ -636,7 +666,7 @@ def test_deploy_with_retries_cancels_when_await_fails(
         testflinger.deploy_with_retries(
             queue_name="ceph-qa-1",
             reserve_for=600,
-            config=BackendConfig("lp:tester"),
+            config=_TESTER_CONFIG,
             testenv_args="",
             testflinger_bin="tf",
             max_attempts=1,
@@ -653,7 +683,7 @@ def test_deploy_with_retries_rejects_zero_attempts() -> None:
         testflinger.deploy_with_retries(
             queue_name="ceph-qa-1",
             reserve_for=600,
-            config=BackendConfig("lp:tester"),
+            config=_TESTER_CONFIG,
             testenv_args="",
             testflinger_bin="tf",
             max_attempts=0,
@@ -668,7 +698,7 @@ def test_deploy_cli_passes_max_attempts(
     runner = CliRunner()
     monkeypatch.setattr(
         "cephtools.testflinger.ensure_backend_config",
-        lambda *a, **k: (BackendConfig("lp:tester"), False),
+        lambda *a, **k: (_TESTER_CONFIG, False),
     )
     monkeypatch.setattr(
         "cephtools.testflinger._ssh_key_reference_warning", lambda v: None
@@ -691,34 +721,8 @@ def test_deploy_cli_passes_max_attempts(
 
 
 def test_read_testenv_network_config(tmp_path: Path) -> None:
-    network_yaml = (
-        "network:\n"
-        "  bridge: lxdbr0\n"
-        "  cidr: 10.0.0.0/24\n"
-        "  gateway: 10.0.0.1\n"
-        "  dynamic_range:\n"
-        "    start: 10.0.0.100\n"
-        "    end: 10.0.0.199\n"
-        "  subnet_id: 1\n"
-        "  fabric_id: 2\n"
-        "  vlan_id: 3\n"
-        "  rack_sysid: racksys-1\n"
-        "  space_id: 4\n"
-        "  external:\n"
-        "    bridge: ext\n"
-        "    cidr: 10.10.0.0/24\n"
-        "    gateway: 10.10.0.1\n"
-        "    dynamic_range:\n"
-        "      start: 10.10.0.100\n"
-        "      end: 10.10.0.199\n"
-        "    subnet_id: 10\n"
-        "    fabric_id: 11\n"
-        "    vlan_id: 12\n"
-        "    rack_sysid: racksys-2\n"
-        "    space_id: 13\n"
-    )
     path = tmp_path / "network.yaml"
-    path.write_text(network_yaml)
+    path.write_bytes(NETWORK_YAML_FULL)
     network = read_testenv_network_config(path)
     assert network["bridge"] == "lxdbr0"
     assert network["dynamic_range"]["start"] == "10.0.0.100"
@@ -728,118 +732,93 @@ def test_read_testenv_network_config(tmp_path: Path) -> None:
 
 
 def test_read_testenv_cloud_config(tmp_path: Path) -> None:
-    cloud_yaml = (
-        "clouds:\n"
-        "  maas-cloud:\n"
-        "    type: maas\n"
-        "    auth-types: [oauth1]\n"
-        "    endpoint: http://10.0.0.1:5240/MAAS\n"
-    )
     path = tmp_path / "cloud.yaml"
-    path.write_text(cloud_yaml)
+    path.write_bytes(CLOUD_YAML)
     clouds = read_testenv_cloud_config(path)
     assert clouds["maas-cloud"]["auth-types"] == ["oauth1"]
     assert clouds["maas-cloud"]["endpoint"] == "http://10.0.0.1:5240/MAAS"
 
 
 def test_read_testenv_credentials(tmp_path: Path) -> None:
-    cred_yaml = (
-        "credentials:\n"
-        "  maas-cloud:\n"
-        "    admin:\n"
-        "      auth-type: oauth1\n"
-        "      maas-oauth: AAA:BBB:CCC\n"
-    )
     path = tmp_path / "cred.yaml"
-    path.write_text(cred_yaml)
+    path.write_bytes(CRED_YAML)
     creds = read_testenv_credentials(path)
     assert creds["maas-cloud"]["admin"]["maas-oauth"] == "AAA:BBB:CCC"
 
 
+# Decoded `maas admin machines read` listings for the machine_ids tests.
+_MACHINES_012 = [{"system_id": s} for s in ("0", "1", "2")]
+_MACHINES_101112 = [{"system_id": s} for s in ("10", "11", "12")]
+_MACHINES_5 = [{"system_id": "5"}]
+
+
 def _write_testenv_files(base: Path) -> None:
     base.mkdir(parents=True, exist_ok=True)
-    (base / "cloud.yaml").write_text(
-        "clouds:\n"
-        "  maas-cloud:\n"
-        "    type: maas\n"
-        "    auth-types: [oauth1]\n"
-        "    endpoint: http://10.0.0.1:5240/MAAS\n"
-    )
-    (base / "cred.yaml").write_text(
-        "credentials:\n"
-        "  maas-cloud:\n"
-        "    admin:\n"
-        "      auth-type: oauth1\n"
-        "      maas-oauth: AAA:BBB:CCC\n"
-    )
-    (base / "network.yaml").write_text("network:\n  bridge: lxdbr0\n")
+    (base / "cloud.yaml").write_bytes(CLOUD_YAML)
+    (base / "cred.yaml").write_bytes(CRED_YAML)
+    (base / "network.yaml").write_bytes(NETWORK_YAML)
 
 
-def test_machine_ids_returns_requested_count(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
-) -> None:
-    _write_testenv_files(state_home)
-
-    def fake_run(cmd, check=True, capture_output=True, text=True):
-        assert cmd[:3] == ["maas", "admin", "machines"]
+@pytest.fixture(scope="session")
+def shared_testenv(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Read-only testenv state shared by tests that never write to it."""
+    base = tmp_path_factory.mktemp("testenv")
+    _write_testenv_files(base)
+    return base
 
-        class Result:
-            stdout = json.dumps(
-                [
-                    {"system_id": "0"},
-                    {"system_id": "1"},
-                    {"system_id": "2"},
-                ]
-            )
-            stderr = ""
 
-        return Result()
+@pytest.fixture
+def testenv_state_home(monkeypatch: pytest.MonkeyPatch, shared_testenv: Path) -> Path:
+    monkeypatch.setenv("CEPHTOOLS_STATE_HOME", str(shared_testenv))
+    return shared_testenv
 
-    monkeypatch.setattr("cephtools.testflinger.subprocess.run", fake_run)
 
-    ids = machine_ids(2)
-    assert ids == ["0", "1"]
+@pytest.fixture
+def machines_run() -> Iterator[MagicMock]:
+    with patch("cephtools.testflinger.subprocess.run") as run:
+        yield run
 
 
-def test_machine_ids_with_offset(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
+@pytest.mark.parametrize(
+    ("machines", "count", "offset", "expected"),
+    [
+        pytest.param(_MACHINES_012, 2, 0, ["0", "1"], id="requested-count"),
+        pytest.param(_MACHINES_101112, 1, 2, ["12"], id="with-offset"),
+        pytest.param(_MACHINES_5, 2, 5, [], id="offset-out-of-range"),
+    ],
+)
+def test_machine_ids(
+    monkeypatch: pytest.MonkeyPatch,
+    testenv_state_home: Path,
+    machines: list[dict[str, str]],
+    count: int,
+    offset: int,
+    expected: list[str],
 ) -> None:
-    _write_testenv_files(state_home)
+    profiles: list[str] = []
 
-    def fake_run(cmd, check=True, capture_output=True, text=True):
-        class Result:
-            stdout = json.dumps(
-                [
-                    {"system_id": "10"},
-                    {"system_id": "11"},
-                    {"system_id": "12"},
-                ]
-            )
-            stderr = ""
+    def fake_load_machines(profile: str) -> list[dict[str, str]]:
+        profiles.append(profile)
+        return machines
 
-        return Result()
+    monkeypatch.setattr(testflinger, "_load_machines", fake_load_machines)
 
-    monkeypatch.setattr("cephtools.testflinger.subprocess.run", fake_run)
+    assert machine_ids(count, offset=offset) == expected
+    assert profiles == ["admin"]
 
-    ids = machine_ids(1, offset=2)
-    assert ids == ["12"]
 
+def test_load_machines_decodes_maas_listing(machines_run: MagicMock) -> None:
+    machines_run.return_value = _result(json.dumps(_MACHINES_012))
 
-def test_machine_ids_offset_out_of_range(
-    monkeypatch: pytest.MonkeyPatch, state_home: Path
-) -> None:
-    _write_testenv_files(state_home)
-
-    def fake_run(cmd, check=True, capture_output=True, text=True):
-        class Result:
-            stdout = json.dumps([{"system_id": "5"}])
-            stderr = ""
+    assert testflinger._load_machines("admin") == _MACHINES_012
+    assert machines_run.call_args.args[0] == ["maas", "admin", "machines", "read"]
 
-        return Result()
 
-    monkeypatch.setattr("cephtools.testflinger.subprocess.run", fake_run)
+def test_load_machines_rejects_non_list(machines_run: MagicMock) -> None:
+    machines_run.return_value = _result('{"system_id": "0"}')
 
-    assert machine_ids(2, offset=5) == []
+    with pytest.raises(ClickException, match="Unexpected MAAS machines response"):
+        testflinger._load_machines("admin")
 
 
 def test_machine_ids_invalid_count() -> None: